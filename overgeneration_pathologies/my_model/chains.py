@@ -0,0 +1,267 @@
+"""
+Run several Gibbs sampler chains until they agree.
+
+Each chain is a GibbsSampler over the same verbs with a random stream of
+its own, spawned from a single numpy SeedSequence. With more than one
+worker, the chains are dealt out among that many processes (at most one
+per chain), which keep them for the whole run and only send back
+summary statistics: after every sweep, the log likelihood and the number
+of tables in the template, root and residue restaurants. Every round of
+sweeps, the second half of each chain's statistics (the first being
+warmup) is checked with the split R-hat and the effective sample size of
+Vehtari et al. (2021), and the run stops once every statistic has an
+R-hat of at most --r-hat and an effective sample size of at least --ess,
+or after --max-sweeps sweeps.
+
+    python chains.py --corpus quran --chains 4 --seed 1 --workers 4
+
+The chains, and so the diagnostics, for a given seed are the same
+whatever the number of workers.
+"""
+
+import argparse
+import multiprocessing
+import os
+import numpy as np
+from corpus import load_corpus
+from gibbs import GibbsSampler, gold_templates
+
+STATISTICS = ("log_likelihood", "template_tables", "root_tables",
+              "residue_tables")
+
+
+def summary_statistics(sampler):
+    """Return the values of STATISTICS for the state of a sampler."""
+    return (sampler.log_likelihood(),
+            sampler.template_restaurant.num_tables,
+            sum(restaurant.num_tables
+                for restaurant in sampler.root_restaurants.values()),
+            sum(restaurant.num_tables
+                for restaurant in sampler.residue_restaurants.values()))
+
+
+def advance(sampler, num_sweeps):
+    """Run num_sweeps sweeps and return the statistics after each."""
+    statistics = list()
+    for _ in range(num_sweeps):
+        sampler.sweep()
+        statistics.append(summary_statistics(sampler))
+    return statistics
+
+
+def run_chain_process(connection, forms, seed_sequences, parameters):
+    """
+    Run the chains of seed_sequences in a worker process for Chains.
+
+    Each message is a number of sweeps for every chain to run, answered
+    with the statistics of each chain, or None, answered with the
+    samplers themselves.
+    """
+    samplers = [GibbsSampler(forms, np.random.default_rng(seed_sequence),
+                             **parameters)
+                for seed_sequence in seed_sequences]
+    while True:
+        num_sweeps = connection.recv()
+        if num_sweeps is None:
+            connection.send(samplers)
+            break
+        connection.send([advance(sampler, num_sweeps)
+                         for sampler in samplers])
+    connection.close()
+
+
+def split_chains(draws):
+    """Split each chain (row) of draws in two, dropping a middle draw."""
+    half = draws.shape[1] // 2
+    return np.concatenate((draws[:, :half], draws[:, -half:]))
+
+
+def split_r_hat(draws):
+    """
+    Return the split R-hat of draws, an array with a row per chain.
+
+    This compares the variance between the halves of the chains with
+    that within them; it is near 1 once they have all mixed.
+    """
+    draws = split_chains(draws)
+    n = draws.shape[1]
+    within = draws.var(axis=1, ddof=1).mean()
+    between = n * draws.mean(axis=1).var(ddof=1)
+    if within == 0:
+        return 1.0 if between == 0 else np.inf
+    return float(np.sqrt(((n - 1) / n * within + between / n) / within))
+
+
+def effective_sample_size(draws):
+    """
+    Return the effective sample size of draws, with a row per chain.
+
+    The autocorrelations are estimated across the split chains, and
+    summed in pairs up to the first negative pair, keeping the pairs
+    decreasing (Geyer's initial monotone sequence).
+    """
+    draws = split_chains(draws)
+    m, n = draws.shape
+    centred = draws - draws.mean(axis=1, keepdims=True)
+    size = 1 << (2 * n - 1).bit_length()
+    transform = np.fft.rfft(centred, size, axis=1)
+    autocovariance = np.fft.irfft(transform * np.conj(transform), size,
+                                  axis=1)[:, :n] / n
+    within = (autocovariance[:, 0] * n / (n - 1)).mean()
+    variance = (n - 1) / n * within + draws.mean(axis=1).var(ddof=1)
+    if variance == 0:
+        return float(m * n)
+
+    autocorrelation = 1 - (within - autocovariance.mean(axis=0)) / variance
+    autocorrelation[0] = 1
+    pairs = autocorrelation[:n - n % 2].reshape(-1, 2).sum(axis=1)
+    negative = np.flatnonzero(pairs < 0)
+    if len(negative):
+        pairs = pairs[:negative[0]]
+    pairs = np.minimum.accumulate(pairs)
+    autocorrelation_time = max(2 * pairs.sum() - 1, 1 / np.log10(m * n))
+    return float(m * n / autocorrelation_time)
+
+
+class Chains:
+    """Several GibbsSamplers over the same verbs, run side by side."""
+
+    def __init__(self, forms, num_chains=4, seed=None, workers=1,
+                 parameters=None):
+        """
+        Start num_chains chains over forms, a list of strings.
+
+        With workers > 1, the chains run in min(workers, num_chains)
+        processes, chain i in process i % workers. parameters are passed
+        on to GibbsSampler.
+        """
+        parameters = parameters or dict()
+        seed_sequences = np.random.SeedSequence(seed).spawn(num_chains)
+        self.traces = [list() for _ in range(num_chains)]
+        if workers > 1:
+            self.samplers = None
+            self.connections = list()
+            self.processes = list()
+            # the chains of each process
+            self.assignments = [list(range(num_chains))[i::workers]
+                                for i in range(min(workers, num_chains))]
+            for chains in self.assignments:
+                connection, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=run_chain_process,
+                    args=(child, forms, [seed_sequences[i] for i in chains],
+                          parameters),
+                    daemon=True)
+                process.start()
+                child.close()
+                self.connections.append(connection)
+                self.processes.append(process)
+        else:
+            self.samplers = [GibbsSampler(forms,
+                                          np.random.default_rng(sequence),
+                                          **parameters)
+                             for sequence in seed_sequences]
+            self.connections = self.processes = None
+
+    @property
+    def num_sweeps(self):
+        return len(self.traces[0])
+
+    def advance(self, num_sweeps):
+        """Run every chain num_sweeps sweeps further."""
+        if self.connections:
+            for connection in self.connections:
+                connection.send(num_sweeps)
+            results = [None] * len(self.traces)
+            for connection, chains in zip(self.connections,
+                                          self.assignments):
+                for i, statistics in zip(chains, connection.recv()):
+                    results[i] = statistics
+        else:
+            results = [advance(sampler, num_sweeps)
+                       for sampler in self.samplers]
+        for trace, statistics in zip(self.traces, results):
+            trace.extend(statistics)
+
+    def draws(self):
+        """
+        Return the statistics after warmup, the first half of the sweeps.
+
+        They are an array indexed by chain, sweep and statistic.
+        """
+        draws = np.array(self.traces, dtype=float)
+        return draws[:, self.num_sweeps // 2:]
+
+    def diagnostics(self):
+        """Return the split R-hat and the ESS of each statistic."""
+        draws = self.draws()
+        return {statistic: (split_r_hat(draws[:, :, i]),
+                            effective_sample_size(draws[:, :, i]))
+                for i, statistic in enumerate(STATISTICS)}
+
+    def run(self, max_sweeps=1000, sweeps_per_round=10, max_r_hat=1.01,
+            min_ess=400):
+        """
+        Generate (sweeps, diagnostics) after each round of sweeps.
+
+        Stop once every statistic has an R-hat of at most max_r_hat and
+        an effective sample size of at least min_ess, or after
+        max_sweeps sweeps.
+        """
+        while self.num_sweeps < max_sweeps:
+            self.advance(min(sweeps_per_round, max_sweeps - self.num_sweeps))
+            if self.num_sweeps < 8:
+                continue  # too few draws after warmup to split
+            diagnostics = self.diagnostics()
+            yield self.num_sweeps, diagnostics
+            if all(r_hat <= max_r_hat and ess >= min_ess
+                   for r_hat, ess in diagnostics.values()):
+                break
+
+    def close(self):
+        """
+        Return the samplers, stopping the chain processes if there are any.
+        """
+        if self.connections:
+            for connection in self.connections:
+                connection.send(None)
+            self.samplers = [None] * len(self.traces)
+            for connection, chains in zip(self.connections,
+                                          self.assignments):
+                for i, sampler in zip(chains, connection.recv()):
+                    self.samplers[i] = sampler
+            for process in self.processes:
+                process.join()
+            self.connections = self.processes = None
+        return self.samplers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--corpus", default="quran",
+                        choices=["quran", "english"])
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-sweeps", type=int, default=1000)
+    parser.add_argument("--sweeps-per-round", type=int, default=10)
+    parser.add_argument("--r-hat", type=float, default=1.01)
+    parser.add_argument("--ess", type=float, default=400)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    chains = Chains([form.decode("ascii") for form in corpus.forms],
+                    args.chains, args.seed, args.workers)
+    print("sweep\t" + "\t".join(f"{statistic}_r_hat\t{statistic}_ess"
+                                for statistic in STATISTICS))
+    for sweep, diagnostics in chains.run(args.max_sweeps,
+                                         args.sweeps_per_round, args.r_hat,
+                                         args.ess):
+        print(f"{sweep}\t" + "\t".join(
+            f"{r_hat:.3f}\t{ess:.0f}" for r_hat, ess in (
+                diagnostics[statistic] for statistic in STATISTICS)),
+            flush=True)
+
+    gold = gold_templates(corpus)
+    for i, sampler in enumerate(chains.close()):
+        print(f"# chain {i}: agreement {sampler.agreement(gold):.3f}")
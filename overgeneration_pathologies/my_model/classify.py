@@ -0,0 +1,125 @@
+"""
+Classify the verbs of a corpus into the word types of the simulation.
+
+As in Simulation.words, a template of two runs of root and residue is
+concatenative and one of three runs is infixing. With more runs it is
+non-concatenative, and then it is nonconcat_cv if its root is all
+consonants and its residue all vowels, or the other way around, and
+unattested otherwise. Verbs with no residue (one run) are never generated
+by the simulation and are counted as degenerate.
+
+Everything is done on whole columns at once. Runs are counted from the
+packed masks: a bit that differs from the next marks a boundary between
+runs, and the boundaries are counted with a SWAR popcount. Whether a
+string is all consonants or all vowels is looked up per segment in a table
+over byte values, once for each distinct root and residue.
+
+    python classify.py
+"""
+
+from collections import Counter
+import numpy as np
+from corpus import load_corpus
+
+CATEGORIES = ("concat", "infix", "nonconcat_cv", "unattested", "degenerate")
+
+# segments that are vowels in each transcription; in Buckwalter, o (no
+# vowel) and ~ (gemination) are neither consonant nor vowel. In DISC, the
+# vowels are the short IE{VQU@, the long i#$u3, the diphthongs 12456789
+# and the nasalized cq0~
+VOWELS = {
+    "quran": "aiuAY{`FNK",
+    "english": "IE{VQU@i#$u312456789cq0~",
+}
+NEITHER = {
+    "quran": "o~",
+    "english": "",
+}
+
+CONSONANT, VOWEL = 1, 2
+
+
+def popcount(values):
+    """Return the number of bits set in each of an array of uint64s."""
+    x = values.astype(np.uint64)
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = ((x & np.uint64(0x3333333333333333)) +
+         ((x >> np.uint64(2)) & np.uint64(0x3333333333333333)))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def count_runs(masks, lengths):
+    """Return the number of runs of 1s and 0s in each packed mask."""
+    one = np.uint64(1)
+    lengths = lengths.astype(np.uint64)
+    masks = masks.astype(np.uint64)
+    # the boundaries between segments i and i + 1, for i < length - 1
+    inside = (one << (np.maximum(lengths, one) - one)) - one
+    boundaries = (masks ^ (masks >> np.uint64(1))) & inside
+    return popcount(boundaries).astype(np.int64) + 1
+
+
+def segment_classes(strings, format):
+    """
+    Return CONSONANT, VOWEL or 0 for each of an array of byte strings.
+
+    A string is CONSONANT or VOWEL if every segment in it is one, and 0
+    if it mixes them or has neither.
+    """
+    table = np.full(256, CONSONANT, dtype=np.uint8)
+    table[0] = 0  # padding
+    table[list(VOWELS[format].encode())] = VOWEL
+    table[list(NEITHER[format].encode())] = 0
+
+    unique, inverse = np.unique(strings, return_inverse=True)
+    width = max(unique.dtype.itemsize, 1)
+    segments = table[np.frombuffer(unique.tobytes(), dtype=np.uint8)
+                     .reshape(len(unique), width)]
+    has_consonant = (segments == CONSONANT).any(axis=1)
+    has_vowel = (segments == VOWEL).any(axis=1)
+    classes = np.where(has_consonant & ~has_vowel, CONSONANT,
+                       np.where(has_vowel & ~has_consonant, VOWEL, 0))
+    return classes[inverse.reshape(-1)].astype(np.uint8)
+
+
+def classify(masks, lengths, root_classes, residue_classes):
+    """Return the index in CATEGORIES of each verb's type."""
+    runs = count_runs(masks, lengths)
+    cv = (root_classes != 0) & (residue_classes != 0) & (
+        root_classes != residue_classes)
+    return np.select(
+        [runs == 1, runs == 2, runs == 3, cv],
+        [CATEGORIES.index("degenerate"), CATEGORIES.index("concat"),
+         CATEGORIES.index("infix"), CATEGORIES.index("nonconcat_cv")],
+        CATEGORIES.index("unattested"))
+
+
+def classify_corpus(corpus):
+    """Return the index in CATEGORIES of the type of each verb in corpus."""
+    return classify(corpus.masks, corpus.lengths,
+                    segment_classes(corpus.roots, corpus.name),
+                    segment_classes(corpus.residues, corpus.name))
+
+
+def typology_counts(corpus):
+    """
+    Count the verbs of each type, as Simulation.simulate does.
+
+    Degenerate verbs, which simulate() never produces, are left out.
+    """
+    counts = np.bincount(classify_corpus(corpus), minlength=len(CATEGORIES))
+    return Counter({category: int(count)
+                    for category, count in zip(CATEGORIES, counts)
+                    if count and category != "degenerate"})
+
+
+if __name__ == "__main__":
+    for format in ("quran", "english"):
+        corpus = load_corpus(format)
+        counts = np.bincount(classify_corpus(corpus),
+                             minlength=len(CATEGORIES))
+        print(format)
+        for category, count in zip(CATEGORIES, counts):
+            print(f"{count}\t{100 * count / len(corpus):.1f}%\t{category}")
+        print()
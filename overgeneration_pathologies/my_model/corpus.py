@@ -0,0 +1,210 @@
+"""
+Load the Fullwood & O'Donnell (2013) verb datasets.
+
+The two files have different columns (see fullwood_odonnell_data/README.txt):
+
+    quran.verbs.data:    verb, mask, root, residue
+    english.verbs.data:  verb, DISC transcription, mask, root, residue
+
+The mask marks each segment of the verb (of its DISC transcription, for
+English) as root (1) or residue (0). Both are read into a Corpus, which
+keeps each column as one numpy array: strings as fixed-width bytes, and
+masks packed into integers, bit i for segment i, alongside their lengths.
+
+A Corpus can be saved as a directory of .npy files and loaded back memory
+mapped, so worker processes share a single copy of it in the page cache
+instead of each parsing the text files again. load_corpus does this
+transparently, rebuilding the saved copy when the text file changes.
+"""
+
+import json
+import os
+import shutil
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.pardir, os.pardir, "fullwood_odonnell_data")
+
+FORMATS = {
+    "quran": ("verb", "mask", "root", "residue"),
+    "english": ("verb", "disc", "mask", "root", "residue"),
+}
+
+# the longest mask that fits in a template key with its length marker
+MAX_LENGTH = 63
+
+
+class Index:
+    """
+    The rows of a Corpus having each value of a column.
+
+    The rows are stored in compressed sparse row form: sorted by value,
+    with the distinct values in self.keys and the rows having keys[i] in
+    self.rows[self.offsets[i]:self.offsets[i + 1]].
+    """
+
+    def __init__(self, keys, offsets, rows):
+        """Initialize from the three arrays."""
+        self.keys = keys
+        self.offsets = offsets
+        self.rows = rows
+
+    @staticmethod
+    def build(column):
+        """Return the Index of the values of column."""
+        rows = np.argsort(column, kind="stable")
+        keys, starts = np.unique(column[rows], return_index=True)
+        offsets = np.append(starts, len(column)).astype(np.int64)
+        return Index(keys, offsets, rows.astype(np.int64))
+
+    def lookup(self, key):
+        """Return the rows whose value is key, in order."""
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.rows[:0]
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def counts(self):
+        """Return the number of rows with each key, in the order of keys."""
+        return np.diff(self.offsets)
+
+    def __len__(self):
+        """Define the length as the number of distinct values."""
+        return len(self.keys)
+
+
+class Corpus:
+    """The verbs of one dataset, stored column by column."""
+
+    COLUMNS = ("verbs", "forms", "masks", "lengths", "roots", "residues")
+    INDEXES = ("root", "residue", "template")
+
+    def __init__(self, name, columns, indexes=None):
+        """
+        Initialize from a dict of column arrays.
+
+        forms is the string the masks cover: the verb itself for Arabic and
+        its DISC transcription for English. Indexes are built unless given.
+        """
+        self.name = name
+        for column in self.COLUMNS:
+            setattr(self, column, columns[column])
+        if indexes is None:
+            indexes = {"root": Index.build(self.roots),
+                       "residue": Index.build(self.residues),
+                       "template": Index.build(self.template_keys())}
+        self.by_root = indexes["root"]
+        self.by_residue = indexes["residue"]
+        self.by_template = indexes["template"]
+
+    def template_keys(self):
+        """
+        Return an integer identifying the template of each verb.
+
+        This is its mask with an extra bit set just past its length, so
+        e.g. 011 and 0011 are kept apart.
+        """
+        return self.masks | (np.uint64(1) << self.lengths.astype(np.uint64))
+
+    def template(self, row):
+        """Return the template of a verb as a string of 1s and 0s."""
+        mask, length = int(self.masks[row]), int(self.lengths[row])
+        return "".join(str(mask >> i & 1) for i in range(length))
+
+    def template_key(self, template):
+        """Return the key in by_template of a template like '0101'."""
+        return np.uint64(int(template[::-1], 2) | 1 << len(template))
+
+    def rows_with_template(self, template):
+        """Return the rows of the verbs with a template like '0101'."""
+        return self.by_template.lookup(self.template_key(template))
+
+    def save(self, directory):
+        """Save the columns and indexes as .npy files in directory."""
+        temporary = directory + ".tmp"
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        for column in self.COLUMNS:
+            np.save(os.path.join(temporary, column + ".npy"),
+                    getattr(self, column))
+        for name in self.INDEXES:
+            index = getattr(self, "by_" + name)
+            for part in ("keys", "offsets", "rows"):
+                np.save(os.path.join(temporary, f"{name}_{part}.npy"),
+                        getattr(index, part))
+        with open(os.path.join(temporary, "corpus.json"), "w") as info:
+            json.dump({"name": self.name}, info)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(temporary, directory)
+
+    @staticmethod
+    def load(directory, mmap_mode="r"):
+        """Load a Corpus saved in directory, memory mapped by default."""
+        def load_array(name):
+            return np.load(os.path.join(directory, name + ".npy"),
+                           mmap_mode=mmap_mode)
+
+        with open(os.path.join(directory, "corpus.json")) as info:
+            name = json.load(info)["name"]
+        columns = {column: load_array(column) for column in Corpus.COLUMNS}
+        indexes = {index: Index(*(load_array(f"{index}_{part}")
+                                  for part in ("keys", "offsets", "rows")))
+                   for index in Corpus.INDEXES}
+        return Corpus(name, columns, indexes)
+
+    def __len__(self):
+        """Define the length as the number of verbs."""
+        return len(self.verbs)
+
+
+def read_corpus(path, format):
+    """Parse a tab-separated dataset with the columns of FORMATS[format]."""
+    fields = FORMATS[format]
+    records = {field: list() for field in fields}
+    with open(path, encoding="ascii") as data_file:
+        for line in data_file:
+            values = line.rstrip("\n").split("\t")
+            assert len(values) == len(fields), line
+            for field, value in zip(fields, values):
+                records[field].append(value)
+
+    masks = records["mask"]
+    assert all(len(mask) <= MAX_LENGTH for mask in masks)
+    return Corpus(format, {
+        "verbs": np.array(records["verb"], dtype=bytes),
+        "forms": np.array(records.get("disc", records["verb"]), dtype=bytes),
+        "masks": np.array([int(mask[::-1], 2) for mask in masks],
+                          dtype=np.uint64),
+        "lengths": np.array([len(mask) for mask in masks], dtype=np.uint8),
+        "roots": np.array(records["root"], dtype=bytes),
+        "residues": np.array(records["residue"], dtype=bytes),
+    })
+
+
+def load_corpus(format, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Return the Corpus of a dataset, e.g. "quran" or "english".
+
+    If cache_dir is given, the Corpus is saved there the first time and
+    memory mapped from there afterwards, until the text file changes.
+    """
+    path = os.path.join(data_dir, format + ".verbs.data")
+    if cache_dir is None:
+        return read_corpus(path, format)
+
+    directory = os.path.join(cache_dir, format)
+    stamp_path = os.path.join(cache_dir, format + ".source.json")
+    stamp = {"path": os.path.abspath(path),
+             "size": os.path.getsize(path),
+             "mtime": os.path.getmtime(path)}
+    if os.path.exists(stamp_path) and os.path.isdir(directory):
+        with open(stamp_path) as stamp_file:
+            if json.load(stamp_file) == stamp:
+                return Corpus.load(directory)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    read_corpus(path, format).save(directory)
+    with open(stamp_path + ".tmp", "w") as stamp_file:
+        json.dump(stamp, stamp_file)
+    os.replace(stamp_path + ".tmp", stamp_path)
+    return Corpus.load(directory)
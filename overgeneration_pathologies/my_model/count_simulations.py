@@ -1,40 +1,220 @@
+"""
+Count how many simulated languages have non-concatenative words.
+
+Each run simulates an independent language of num_words words. Runs are
+spread over a pool of worker processes, each with its own random stream
+spawned from a single numpy SeedSequence, so the counts for a given seed
+are the same whatever the number of workers.
+
+    python count_simulations.py --runs 1000 --words 100 --seed 1
+
+With --width, runs are added a batch at a time until the confidence
+interval of every threshold's proportion is at most that wide, up to
+--runs runs. Proportions near 0 or 1 need far fewer runs than the rest.
+
+    python count_simulations.py --width 0.02 --words 100 --seed 1
+
+With --exact, the probabilities of the two non-concatenative thresholds
+are computed exactly instead (see exact.py), as bounds no further apart
+than --tolerance; the unattested thresholds are still estimated by
+sampling.
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import os
+import numpy as np
+from scipy import stats
+from exact import nonconcat_probabilities
 from simulation import Simulation
 
-count_at_least_one_nonconcat = 0
-count_at_least_half_nonconcat = 0
-count_at_least_one_unattested = 0
-count_at_least_half_unattested = 0
+# as in OT's TypologySummary: at least one word, or more than half of them
+THRESHOLDS = ["at least one nonconcat", "more than half nonconcat",
+              "at least one unattested", "more than half unattested"]
+
+
+def run_replicate(simulation, seed_sequence, num_words):
+    """Simulate one language and return which thresholds it passes."""
+    simulation.reset(np.random.default_rng(seed_sequence))
+    counts = simulation.simulate(num_words)
+    return np.array([
+        counts['nonconcat_cv'] + counts['unattested'] >= 1,
+        counts['nonconcat_cv'] + counts['unattested'] > num_words / 2,
+        counts['unattested'] >= 1,
+        counts['unattested'] > num_words / 2,
+    ], dtype=np.int64)
+
+
+def run_batch(seed_sequences, num_words, parameters=None):
+    """
+    Run a batch of replicates and add up their threshold counts.
+
+    parameters are passed on to Simulation.
+    """
+    simulation = Simulation(**(parameters or dict()))
+    counts = np.zeros(len(THRESHOLDS), dtype=np.int64)
+    for seed_sequence in seed_sequences:
+        counts += run_replicate(simulation, seed_sequence, num_words)
+    return counts
+
+
+def seed_batches(num_runs, seed=None, batch_size=100):
+    """Split the seeds of num_runs replicates into batches."""
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_runs)
+    return [seed_sequences[i:i + batch_size]
+            for i in range(0, num_runs, batch_size)]
+
+
+def count_simulations(num_runs, num_words, seed=None, workers=1,
+                      batch_size=100, parameters=None):
+    """Return, for each threshold, the number of runs that pass it."""
+    batches = seed_batches(num_runs, seed, batch_size)
+
+    if workers == 1:
+        return sum((run_batch(batch, num_words, parameters)
+                    for batch in batches),
+                   np.zeros(len(THRESHOLDS), dtype=np.int64))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(run_batch, batches,
+                                itertools.repeat(num_words),
+                                itertools.repeat(parameters)),
+                   np.zeros(len(THRESHOLDS), dtype=np.int64))
+
+
+def wilson_interval(count, num_runs, confidence=0.95):
+    """Return the Wilson score interval of a proportion."""
+    z = stats.norm.ppf(1 - (1 - confidence) / 2)
+    proportion = count / num_runs
+    centre = (proportion + z * z / (2 * num_runs)) / (1 + z * z / num_runs)
+    half_width = z / (1 + z * z / num_runs) * np.sqrt(
+        proportion * (1 - proportion) / num_runs +
+        z * z / (4 * num_runs * num_runs))
+    return (max(centre - half_width, 0.0), min(centre + half_width, 1.0))
+
+
+def clopper_pearson_interval(count, num_runs, confidence=0.95):
+    """Return the Clopper-Pearson (exact binomial) interval of a proportion."""
+    tail = (1 - confidence) / 2
+    low = (stats.beta.ppf(tail, count, num_runs - count + 1)
+           if count > 0 else 0.0)
+    high = (stats.beta.ppf(1 - tail, count + 1, num_runs - count)
+            if count < num_runs else 1.0)
+    return (float(low), float(high))
+
+
+INTERVALS = {"wilson": wilson_interval,
+             "clopper-pearson": clopper_pearson_interval}
+
+
+def count_until_converged(num_words, width, confidence=0.95,
+                          interval="wilson", seed=None, workers=1,
+                          batch_size=100, max_runs=100000, parameters=None):
+    """
+    Run batches of replicates until every threshold is estimated closely.
+
+    Stop as soon as the confidence interval of each threshold's proportion
+    is at most width wide, or after max_runs runs. Return the counts and
+    the number of runs. Batches are added up, and checked, in order, so
+    for a given seed the result is the same whatever the number of
+    workers, and the counts are those of count_simulations for as many
+    runs.
+    """
+    root = np.random.SeedSequence(seed)
+    counts = np.zeros(len(THRESHOLDS), dtype=np.int64)
+    num_runs = num_spawned = 0
+    pending = deque()  # (number of runs, counts or future)
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        while True:
+            # keep every worker busy with the batches that come next
+            while num_spawned < max_runs and len(pending) < max(workers, 1):
+                batch = root.spawn(min(batch_size, max_runs - num_spawned))
+                num_spawned += len(batch)
+                pending.append((len(batch), executor.submit(
+                    run_batch, batch, num_words, parameters) if executor
+                    else run_batch(batch, num_words, parameters)))
+            if not pending:
+                break
+
+            batch_runs, batch_counts = pending.popleft()
+            counts += batch_counts.result() if executor else batch_counts
+            num_runs += batch_runs
+            if all(high - low <= width for low, high in (
+                    INTERVALS[interval](count, num_runs, confidence)
+                    for count in counts)):
+                break
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+    return counts, num_runs
+
+
+def typology_probabilities(num_runs, num_words, seed=None, workers=1,
+                           tolerance=1e-6, parameters=None):
+    """
+    Return (low, high) bounds on the probability of passing each threshold.
+
+    The non-concatenative thresholds are computed exactly; the unattested
+    ones are estimated from num_runs simulations, as 95% Wilson intervals.
+    """
+    counts = count_simulations(num_runs, num_words, seed, workers,
+                               parameters=parameters)
+    estimates = [wilson_interval(count, num_runs) for count in counts]
+    return (nonconcat_probabilities(num_words, tolerance,
+                                    **(parameters or dict())) +
+            estimates[2:])
+
 
-num_words = 100
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--exact", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--width", type=float, default=None)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--interval", choices=sorted(INTERVALS),
+                        default="wilson")
+    args = parser.parse_args()
 
-for i in range(1000):
-    s = Simulation()
-    counts = s.simulate(num_words)
-    if counts['nonconcat_cv'] + counts['unattested'] > 1:
-        count_at_least_one_nonconcat += 1
-    if counts['nonconcat_cv'] + counts['unattested'] > m / 2:
-        count_at_least_half_nonconcat += 1
-    if counts['unattested'] > 1:
-        count_at_least_one_unattested += 1
-    if counts['unattested'] > m / 2:
-        count_at_least_half_unattested += 1
+    if args.width:
+        counts, num_runs = count_until_converged(
+            args.words, args.width, args.confidence, args.interval,
+            args.seed, args.workers, max_runs=args.runs)
+        print(f"# {num_runs} runs")
+        for threshold, count in zip(THRESHOLDS, counts):
+            low, high = INTERVALS[args.interval](count, num_runs,
+                                                 args.confidence)
+            print(f"{count}\t{low:.4f}\t{high:.4f}\t{threshold}")
+    elif args.exact:
+        for threshold, (low, high) in zip(THRESHOLDS, typology_probabilities(
+                args.runs, args.words, args.seed, args.workers,
+                args.tolerance)):
+            print(f"{low:.8f}\t{high:.8f}\t{threshold}")
+    else:
+        for count in count_simulations(args.runs, args.words, args.seed,
+                                       args.workers):
+            print(count)
 
-print(count_at_least_one_nonconcat)
-print(count_at_least_half_nonconcat)
-print(count_at_least_one_unattested)
-print(count_at_least_half_unattested)
 
+# recorded when the first and third thresholds were more than one word
 
 # num_words = 20
 # i = 1000
-# 998  at least one nonconcat
-# 142  at least half nonconcat
-# 998  at least one unattested
-# 115  at least half unattested
+# 998  more than one nonconcat
+# 142  more than half nonconcat
+# 998  more than one unattested
+# 115  more than half unattested
 
 # num_words = 100
 # i = 1000
-# 1000 at least one nonconcat
-# 3 at least half nonconcat
-# 1000 at least one unattested
-# 1 at least half unattested
+# 1000 more than one nonconcat
+# 3 more than half nonconcat
+# 1000 more than one unattested
+# 1 more than half unattested
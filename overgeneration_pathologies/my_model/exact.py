@@ -0,0 +1,165 @@
+"""
+Compute the non-concatenative thresholds of count_simulations exactly.
+
+Whether a word is non-concatenative depends only on its template, so only
+the template restaurant matters. Every template falls in one of three
+classes: degenerate (all r's or all s's, which simulate() skips),
+concatenative or infixing, and non-concatenative. A new table draws its
+template, and so its class, independently from the base distribution.
+
+The Pitman-Yor seating is exchangeable, so the probability of a sequence
+of customers' classes depends only on how many customers (m) and tables
+(k) each class has:
+
+    A(K) / (beta + 1)_(t - 1) * prod over classes of b^k S(m, k)
+
+where t = sum of m, K = sum of k, A(K) = prod_{i=1}^{K-1} (beta + i alpha),
+b is the base probability of the class and S(m, k) is the generalized
+Stirling number, the total weight prod (1 - alpha)_(size - 1) of the ways
+of seating m customers at k tables. A language of num_words words ends
+with the num_words-th customer whose template is not degenerate, so
+summing over the number of degenerate customers before then gives the
+distribution of the number of non-concatenative words. The sum over
+degenerate customers is cut off once what is left of it is small, and
+what is left bounds the error.
+
+Everything is computed in log space, as the terms overflow a float.
+"""
+
+import numpy as np
+from scipy.special import logsumexp
+from simulation import alpha, beta, lambda_, p
+
+DEGENERATE, CONCAT_OR_INFIX, NONCONCAT = range(3)
+
+
+def template_class_probabilities(lambda_=lambda_, prob_one=0.5):
+    """
+    Return the probabilities that a new template is of each class.
+
+    Template lengths are Poisson distributed, excluding 0, and each
+    segment is an r with probability prob_one.
+    """
+    probabilities = np.zeros(3)
+    # runs[i, s]: probability of a string so far with i + 1 runs (the
+    # last counting all of 4 or more) that ends in r (s = 0) or s (s = 1)
+    runs = np.zeros((4, 2))
+    runs[0] = [prob_one, 1 - prob_one]
+    length, length_probability = 1, lambda_ * np.exp(-lambda_)
+    remaining = 1 - np.exp(-lambda_)
+    while remaining > 1e-16:
+        weight = length_probability / (1 - np.exp(-lambda_))
+        probabilities[DEGENERATE] += weight * runs[0].sum()
+        probabilities[CONCAT_OR_INFIX] += weight * runs[1:3].sum()
+        probabilities[NONCONCAT] += weight * runs[3].sum()
+
+        # add a segment, which either continues the last run or not
+        switched = np.zeros((4, 2))
+        switched[1:] = runs[:-1, ::-1]
+        switched[3] += runs[3, ::-1]
+        runs = (runs + switched) * [prob_one, 1 - prob_one]
+
+        remaining -= length_probability
+        length += 1
+        length_probability *= lambda_ / length
+    return probabilities
+
+
+def log_stirling(max_customers, alpha=alpha):
+    """
+    Return log(S(m, k) / m!) for m, k up to max_customers.
+
+    S(m + 1, k) = (m - alpha k) S(m, k) + S(m, k - 1): customer m + 1
+    either joins one of k tables or starts the k-th.
+    """
+    table = np.full((max_customers + 1, max_customers + 1), -np.inf)
+    table[0, 0] = 0
+    tables = np.arange(max_customers + 1)
+    with np.errstate(divide="ignore"):
+        for m in range(max_customers):
+            join = np.log(np.maximum(m - alpha * tables, 0)) + table[m]
+            start = np.concatenate(([-np.inf], table[m, :-1]))
+            table[m + 1] = np.logaddexp(join, start) - np.log(m + 1)
+    return table
+
+
+def nonconcat_distribution(num_words, max_degenerate, alpha=alpha,
+                           beta=beta, lambda_=lambda_, p=p):
+    """
+    Return the probabilities of each number of non-concatenative words.
+
+    Only languages with at most max_degenerate degenerate templates are
+    counted, so the probabilities add up to slightly less than 1.
+    """
+    with np.errstate(divide="ignore"):
+        log_base = np.log(template_class_probabilities(lambda_, p))
+    max_customers = num_words + max_degenerate
+    stirling = log_stirling(max_customers, alpha)
+    # log A(K) for K up to max_customers
+    log_a = np.concatenate(([0, 0], np.cumsum(
+        np.log(beta + alpha * np.arange(1, max_customers)))))
+
+    words = np.arange(num_words + 1)
+    degenerate = np.arange(max_degenerate + 1)
+    # log of b^k S(m, k) / m! for m degenerate customers at k tables
+    log_degenerate = (stirling[:max_degenerate + 1, :max_degenerate + 1] +
+                      degenerate * log_base[DEGENERATE])
+
+    log_probabilities = np.empty((num_words + 1, max_degenerate + 1))
+    for j in words:
+        # the non-degenerate customers: num_words - j concatenative or
+        # infixing at k1 tables and j non-concatenative at k2 tables
+        log_concat = (stirling[num_words - j, :num_words + 1] +
+                      words * log_base[CONCAT_OR_INFIX])
+        log_nonconcat = (stirling[j, :num_words + 1] +
+                         words * log_base[NONCONCAT])
+        pairs = log_concat[:, None] + log_nonconcat[None, :]
+        log_tables = np.full(num_words + 1, -np.inf)  # by k1 + k2
+        for k1 in words:
+            log_tables[k1:] = np.logaddexp(log_tables[k1:],
+                                           pairs[k1, :num_words + 1 - k1])
+
+        # add the degenerate tables and weight by A(K)
+        log_weights = logsumexp(
+            log_tables[None, :] + log_a[words[None, :] + degenerate[:, None]],
+            axis=1)
+        log_probabilities[j] = logsumexp(
+            log_degenerate + log_weights[None, :], axis=1)
+
+    # the customers can come in any order, as long as the last is one of
+    # the num_words non-degenerate ones: t!/prod(m!) * num_words / t ways
+    customers = num_words + degenerate
+    log_orders = np.concatenate(([0], np.cumsum(
+        np.log(np.arange(1, max_customers) /
+               (beta + np.arange(1, max_customers))))))
+    return num_words * np.exp(
+        log_probabilities + log_orders[customers - 1]).sum(axis=1)
+
+
+def nonconcat_probabilities(num_words, tolerance=1e-6, max_degenerate=None,
+                            alpha=alpha, beta=beta, lambda_=lambda_, p=p):
+    """
+    Return bounds on the probabilities of the non-concatenative thresholds.
+
+    The thresholds are the first two of count_simulations.THRESHOLDS:
+    at least one word, and more than half of the words, non-concatenative.
+    Each is returned as a (low, high) pair. The number of degenerate
+    templates allowed for is doubled until the bounds are narrower than
+    tolerance, or until it would pass max_degenerate (by default 64 times
+    num_words).
+    """
+    if max_degenerate is None:
+        max_degenerate = 64 * num_words
+    allowed = num_words
+    while True:
+        distribution = nonconcat_distribution(num_words, allowed,
+                                              alpha, beta, lambda_, p)
+        missing = max(1 - distribution.sum(), 0)
+        if missing < tolerance or 2 * allowed > max_degenerate:
+            break
+        allowed *= 2
+
+    words = np.arange(num_words + 1)
+    return [(float(low), float(min(low + missing, 1))) for low in (
+        distribution[words >= 1].sum(),
+        distribution[words > num_words / 2].sum())]
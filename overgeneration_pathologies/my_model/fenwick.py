@@ -0,0 +1,74 @@
+"""A Fenwick tree for sampling from a growing list of weights."""
+
+from array import array
+
+
+class FenwickTree:
+    """
+    A Fenwick (binary indexed) tree of non-negative weights.
+
+    Appending or removing the last weight, changing a weight, taking a
+    prefix sum and finding the item at which the running total passes a
+    target all take O(log n) time. The sums are stored as doubles in an
+    array, which takes 8 bytes per weight.
+    """
+
+    def __init__(self):
+        """Initialize an empty tree."""
+        # 1-based: node i holds the sum of weights (i - lowbit(i), i]
+        self._tree = array("d", [0])
+
+    def append(self, weight):
+        """Add a new weight at the end."""
+        i = len(self._tree)
+        total = weight
+        j = i - 1
+        stop = i - (i & -i)
+        while j > stop:
+            total += self._tree[j]
+            j -= j & -j
+        self._tree.append(total)
+
+    def pop(self):
+        """Remove the last weight."""
+        # no other node sums over the last weight, so it is only dropped
+        del self._tree[-1]
+
+    def clear(self):
+        """Remove all the weights."""
+        del self._tree[1:]
+
+    def add(self, index, delta):
+        """Add delta to the weight at index (counting from 0)."""
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, n):
+        """Return the sum of the first n weights."""
+        total = 0
+        while n > 0:
+            total += self._tree[n]
+            n -= n & -n
+        return total
+
+    def find(self, target):
+        """
+        Return the index of the item at which the running total exceeds target.
+
+        Returns len(self) if target is at least the total of all weights.
+        """
+        position = 0
+        step = 1 << (len(self).bit_length() - 1) if len(self) else 0
+        while step:
+            if (position + step < len(self._tree) and
+               self._tree[position + step] <= target):
+                position += step
+                target -= self._tree[position]
+            step >>= 1
+        return position
+
+    def __len__(self):
+        """Define the length as the number of weights."""
+        return len(self._tree) - 1
@@ -0,0 +1,262 @@
+"""
+Fit the model to a verb corpus by collapsed Gibbs sampling.
+
+Each verb of the corpus is one word of the model: a template, and a root
+and a residue that fill in its r's and s's. Only the verbs are observed,
+so the sampler infers their segmentations. The restaurants are integrated
+out: each verb in turn is removed from the template, root and residue
+restaurants it is seated in, a new segmentation is drawn with probability
+proportional to the product of the three predictive probabilities, and
+the verb is seated again. Every step only moves one customer per
+restaurant, so the restaurants are updated in place rather than rebuilt.
+
+Templates are drawn from the template restaurant's own base distribution.
+As in Simulation.words, which skips them, a word never has an all-r or
+all-s template, so every verb has a non-empty root and residue, and verbs
+of a single segment cannot be segmented at all. Roots and residues are
+strings of the corpus's segments rather than of C's and V's, so their
+base distribution is uniform over the segments.
+
+    python gibbs.py --corpus quran --sweeps 200 --seed 1 \\
+        --checkpoint quran.gibbs
+
+With --checkpoint, the state of the sampler is saved every
+--checkpoint-every sweeps, and a run started again with the same
+checkpoint carries on from where it was saved.
+"""
+
+import argparse
+from bisect import bisect
+from itertools import accumulate
+from operator import itemgetter
+import os
+import pickle
+import numpy as np
+from corpus import load_corpus
+from simulation import Simulation, alpha, beta, lambda_, p
+
+# the parts of a sampler saved in a checkpoint
+STATE = ("forms", "segmentations", "num_sweeps", "random_stream",
+         "template_restaurant", "root_restaurants", "residue_restaurants")
+
+
+def _morpheme_getter(positions):
+    """Return a function picking the segments at positions from a form."""
+    if not positions:
+        return lambda form: ""
+    if len(positions) == 1:
+        return itemgetter(positions[0])
+    getter = itemgetter(*positions)
+    return lambda form: "".join(getter(form))
+
+
+def gold_templates(corpus):
+    """Return the template of each verb of a Corpus, in r's and s's."""
+    return [corpus.template(row).replace("1", "r").replace("0", "s")
+            for row in range(len(corpus))]
+
+
+class GibbsSampler(Simulation):
+    """A collapsed Gibbs sampler over the segmentations of some verbs."""
+
+    def __init__(self, forms, rng=None, alpha=alpha, beta=beta,
+                 lambda_=lambda_, p=p):
+        """
+        Sample segmentations of forms, a list of strings.
+
+        Random numbers are drawn from rng, a numpy Generator, and the
+        parameters default to the module-level values of simulation.
+        """
+        super().__init__(rng, alpha, beta, lambda_, p)
+        self.forms = list(forms)
+        short = [form for form in self.forms if len(form) < 2]
+        if short:
+            raise ValueError(f"{len(short)} verbs too short to have a root "
+                             f"and a residue, e.g. {short[0]!r}")
+        self.alphabet_size = len(set("".join(self.forms)))
+        self.segmentations = [None] * len(self.forms)
+        self.num_sweeps = 0
+        self._templates = dict()  # length -> possible templates
+
+    def __getstate__(self):
+        # the templates hold lambdas, which cannot be pickled; they are
+        # made again as needed
+        state = dict(self.__dict__)
+        state["_templates"] = dict()
+        return state
+
+    def templates(self, length):
+        """
+        Return the possible templates of a verb of length segments.
+
+        Each is a tuple of the template, its base probability, and
+        functions picking out the root and the residue from a verb. The
+        all-r and all-s templates are left out.
+        """
+        if length not in self._templates:
+            restaurant = self.template_restaurant
+            templates = list()
+            for mask in range(1, 2 ** length - 1):
+                template = "".join(
+                    restaurant.one if mask >> i & 1 else restaurant.zero
+                    for i in range(length))
+                templates.append((
+                    template, restaurant.base_probability(template),
+                    _morpheme_getter([i for i in range(length)
+                                      if template[i] == restaurant.one]),
+                    _morpheme_getter([i for i in range(length)
+                                      if template[i] == restaurant.zero])))
+            self._templates[length] = templates
+        return self._templates[length]
+
+    def morpheme_probability(self, morpheme):
+        """Return the base probability of a root or residue."""
+        return self.alphabet_size ** -len(morpheme)
+
+    def _seat(self, template, template_probability, root, residue):
+        self.template_restaurant.add_customer(
+            template, template_probability, self.random_stream)
+        self.root_restaurant(len(root)).add_customer(
+            root, self.morpheme_probability(root), self.random_stream)
+        self.residue_restaurant(len(residue)).add_customer(
+            residue, self.morpheme_probability(residue), self.random_stream)
+
+    def _unseat(self, template, root, residue):
+        self.template_restaurant.remove_customer(template, self.random_stream)
+        self.root_restaurants[len(root)].remove_customer(
+            root, self.random_stream)
+        self.residue_restaurants[len(residue)].remove_customer(
+            residue, self.random_stream)
+
+    def sample(self, i):
+        """Draw a new segmentation of verb i given all the others."""
+        if self.segmentations[i] is not None:
+            self._unseat(*self.segmentations[i])
+
+        form = self.forms[i]
+        template_restaurant = self.template_restaurant
+        templates = self.templates(len(form))
+        weights = list()
+        for template, template_probability, get_root, get_residue in (
+                templates):
+            root, residue = get_root(form), get_residue(form)
+            weights.append(
+                template_restaurant.predictive(template,
+                                               template_probability) *
+                self.root_restaurant(len(root)).predictive(
+                    root, self.morpheme_probability(root)) *
+                self.residue_restaurant(len(residue)).predictive(
+                    residue, self.morpheme_probability(residue)))
+
+        cumulative = list(accumulate(weights))
+        choice = min(bisect(cumulative,
+                            self.random_stream.random() * cumulative[-1]),
+                     len(templates) - 1)
+        template, template_probability, get_root, get_residue = (
+            templates[choice])
+        root, residue = get_root(form), get_residue(form)
+        self._seat(template, template_probability, root, residue)
+        self.segmentations[i] = (template, root, residue)
+
+    def sweep(self):
+        """
+        Resample the segmentation of every verb once.
+
+        The first sweep seats the verbs one after another in order, each
+        given those before it; later sweeps visit them in a random order.
+        """
+        if self.num_sweeps == 0:
+            order = range(len(self.forms))
+        else:
+            order = self.random_stream.rng.permutation(len(self.forms))
+        for i in order:
+            self.sample(i)
+        self.num_sweeps += 1
+
+    def log_likelihood(self):
+        """Return the log joint probability of the segmentations."""
+        restaurants = (list(self.root_restaurants.values()) +
+                       list(self.residue_restaurants.values()))
+        return (self.template_restaurant.log_probability(
+                    self.template_restaurant.base_probability) +
+                sum(restaurant.log_probability(self.morpheme_probability)
+                    for restaurant in restaurants))
+
+    def comparable(self, templates):
+        """Return the indices of the verbs as long as their templates."""
+        return [i for i, (form, template) in
+                enumerate(zip(self.forms, templates))
+                if len(form) == len(template)]
+
+    def agreement(self, templates):
+        """
+        Return the proportion of verbs segmented as in templates.
+
+        Verbs whose template is not as long as the verb itself (a few in
+        the English data) could never agree, so they are left out.
+        """
+        comparable = self.comparable(templates)
+        return sum(self.segmentations[i][0] == templates[i]
+                   for i in comparable) / len(comparable)
+
+    def save_checkpoint(self, path):
+        """Save the state of the sampler to path."""
+        with open(path + ".tmp", "wb") as checkpoint:
+            pickle.dump({name: getattr(self, name) for name in STATE},
+                        checkpoint, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def load_checkpoint(self, path):
+        """
+        Carry on from the state saved in path.
+
+        Raises ValueError if the checkpoint was made for other verbs.
+        """
+        with open(path, "rb") as checkpoint:
+            state = pickle.load(checkpoint)
+        if state["forms"] != self.forms:
+            raise ValueError(f"{path} is a checkpoint of other verbs")
+        for name in STATE:
+            setattr(self, name, state[name])
+
+    def run(self, num_sweeps, checkpoint_path=None, checkpoint_every=10):
+        """
+        Generate (sweep, log likelihood) after each sweep, up to num_sweeps.
+
+        If checkpoint_path is given, the sampler carries on from the
+        checkpoint there if there is one, and saves one every
+        checkpoint_every sweeps and after the last.
+        """
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.load_checkpoint(checkpoint_path)
+        while self.num_sweeps < num_sweeps:
+            self.sweep()
+            if checkpoint_path and (self.num_sweeps % checkpoint_every == 0 or
+                                    self.num_sweeps == num_sweeps):
+                self.save_checkpoint(checkpoint_path)
+            yield self.num_sweeps, self.log_likelihood()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--corpus", default="quran",
+                        choices=["quran", "english"])
+    parser.add_argument("--sweeps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--checkpoint-every", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    gold = gold_templates(corpus)
+    sampler = GibbsSampler([form.decode("ascii") for form in corpus.forms],
+                           np.random.default_rng(args.seed))
+    left_out = len(gold) - len(sampler.comparable(gold))
+    if left_out:
+        print(f"# {left_out} verbs left out of the agreement, as their "
+              "templates and transcriptions differ in length")
+    print("sweep\tlog_likelihood\tagreement")
+    for sweep, log_likelihood in sampler.run(args.sweeps, args.checkpoint,
+                                             args.checkpoint_every):
+        print(f"{sweep}\t{log_likelihood:.2f}\t{sampler.agreement(gold):.3f}",
+              flush=True)
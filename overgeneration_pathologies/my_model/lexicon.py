@@ -0,0 +1,55 @@
+"""
+Write a simulated lexicon to a tab-separated file, one word per line.
+
+Words are written as they are sampled, so lexicons far larger than memory
+can be produced; only the restaurants' tables are kept.
+
+    python lexicon.py --words 1000000 --seed 1 > lexicon.tsv
+"""
+
+import argparse
+import gzip
+import sys
+import numpy as np
+from simulation import Simulation
+
+COLUMNS = ("template", "root", "residue", "typology")
+
+
+def write_lexicon(words, lexicon_file):
+    """Write (template, root, residue, typology) records as they come."""
+    print("\t".join(COLUMNS), file=lexicon_file)
+    lexicon_file.writelines("\t".join(word) + "\n" for word in words)
+
+
+def read_lexicon(lexicon_file):
+    """
+    Generate the records of a lexicon written by write_lexicon.
+
+    Raises ValueError if the file does not start with the header.
+    """
+    header = next(lexicon_file, "").rstrip("\n").split("\t")
+    if header != list(COLUMNS):
+        raise ValueError(f"expected the header {list(COLUMNS)}, "
+                         f"found {header}")
+    for line in lexicon_file:
+        yield tuple(line.rstrip("\n").split("\t"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None,
+                        help="gzip-compressed if it ends in .gz")
+    args = parser.parse_args()
+
+    simulation = Simulation(np.random.default_rng(args.seed))
+    if args.output is None:
+        write_lexicon(simulation.words(args.words), sys.stdout)
+    elif args.output.endswith(".gz"):
+        with gzip.open(args.output, "wt") as lexicon_file:
+            write_lexicon(simulation.words(args.words), lexicon_file)
+    else:
+        with open(args.output, "w") as lexicon_file:
+            write_lexicon(simulation.words(args.words), lexicon_file)
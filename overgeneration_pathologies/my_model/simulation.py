@@ -1,10 +1,10 @@
 """Carry out simulation of my model."""
 
-import re
-import random
+from array import array
 from collections import defaultdict, Counter
+import math
 import numpy as np
-from scipy.stats import poisson
+from fenwick import FenwickTree
 
 p = 0.5
 lambda_ = 5  # TODO
@@ -12,36 +12,75 @@ alpha = 0.9  # TODO  alpha < 1
 beta = 5    # TODO  b >= -a
 
 
-def generate_string_length(lambda_):
-    """Generate a string length > 0 from Poisson distribution."""
-    length = 0
-    while not length:
-        length = poisson(lambda_).rvs(1,)
-    return length
+class RandomStream:
+    """
+    Random numbers for a simulation, drawn from a numpy Generator in blocks.
 
+    Drawing numbers one at a time from numpy (or creating a scipy
+    distribution per draw) costs far more than the numbers themselves, so
+    uniform variates and string lengths are drawn a block at a time and
+    handed out one by one.
+    """
 
-def generate_string(length, zero, one, prob_one=0.5):
-    string = ""
-    for i in range(length):
-        target = random.random()
-        if target > prob_one:
-            string += zero
-        else:
-            string += one
-    return string
+    def __init__(self, rng=None, block_size=4096):
+        self.block_size = block_size
+        self._lengths = defaultdict(list)  # lambda_ -> lengths left
+        self.reset(rng)
+
+    def reset(self, rng=None):
+        """Start drawing from rng, discarding numbers already drawn."""
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._uniforms = []
+        for lengths in self._lengths.values():
+            lengths.clear()
+
+    def random(self):
+        """Return a uniform variate in [0, 1)."""
+        if not self._uniforms:
+            self._uniforms = self.rng.random(self.block_size).tolist()[::-1]
+        return self._uniforms.pop()
+
+    def string_length(self, lambda_):
+        """Return a string length > 0 from Poisson distribution."""
+        lengths = self._lengths[lambda_]
+        while not lengths:
+            # zero-truncate by dropping the zeros from a block of draws
+            block = self.rng.poisson(lambda_, max(1, self.block_size // 16))
+            lengths.extend(block[block > 0].tolist())
+        return lengths.pop()
+
+    def string(self, length, zero, one, prob_one=0.5):
+        """Return a string of length characters, each one with prob_one."""
+        return "".join(one if self.random() <= prob_one else zero
+                       for i in range(length))
+
+
+def segment_class(morpheme):
+    """Return "C" or "V" if morpheme is all C's or all V's, else None."""
+    classes = set(morpheme)
+    return classes.pop() if len(classes) == 1 else None
 
 
 class Table:
-    """A table at the CRP restaurant."""
-    num_customers = 0
+    """
+    A table at the CRP restaurant.
 
-    def __init__(self, length, zero, one):
-        if length == "any":
-            length = generate_string_length(lambda_)[0]
-        self.string = generate_string(length, zero, one)
+    Restaurants store their tables as arrays, so a Table is only a view of
+    one of them, made when the tables are printed.
+    """
+    __slots__ = ("restaurant", "index")
 
-    def seat(self):
-        self.num_customers += 1
+    def __init__(self, restaurant, index):
+        self.restaurant = restaurant
+        self.index = index
+
+    @property
+    def string(self):
+        return self.restaurant.dish(self.index)
+
+    @property
+    def num_customers(self):
+        return self.restaurant.counts[self.index]
 
     def __str__(self):
         return self.string + " (" + str(self.num_customers) + ")"
@@ -51,39 +90,277 @@ class Table:
 
 
 class Restaurant:
-    """A CRP restaurant."""
-
-    def select_table(self):
+    """
+    A CRP restaurant.
+
+    Each table is stored as an entry in parallel arrays: its number of
+    customers, and the code of its dish (string) in self.dishes, where
+    each distinct dish is kept once, along with whatever describe() makes
+    of it in self.descriptions. The seating weight (customers - alpha)
+    of every table is kept in a Fenwick tree, and the total number of
+    customers is kept as a running count, so choosing and seating at a
+    table take O(log tables) time.
+
+    For inference, customers can also be seated at a given dish and
+    removed again, also in O(log tables) time. Each dish keeps a list of
+    its tables, with their customers and seating weights in Fenwick trees
+    of its own, so the table to join or leave is found without looking
+    through the dish's tables. As forward simulation never needs them,
+    the trees are only built when a customer is first added or removed
+    this way. The places of tables left empty are kept on a free list for
+    new tables to reuse.
+    """
+
+    def __init__(self, alpha=alpha, beta=beta, p=p):
+        self.alpha = alpha
+        self.beta = beta
+        self.p = p
+        self.counts = array("q")
+        self.dish_codes = array("q")
+        self.dishes = list()
+        self.descriptions = list()
+        self.dish_customers = array("q")  # dish code -> customers
+        self.dish_tables = list()  # dish code -> indices of its tables
+        self.dish_counts = list()  # dish code -> customers at each table
+        self.dish_weights = list()  # dish code -> weight of each table
+        self.table_slots = array("q")  # table -> its place in dish_tables
+        self.free_tables = list()
+        self._dish_index = dict()  # dish -> code
+        self._by_dish = False  # whether the dish trees are kept
+        self.weights = FenwickTree()
+        self.num_customers = 0
+        self.num_tables = 0
+
+    def reset(self):
+        """Empty the restaurant, keeping its storage for reuse."""
+        del self.counts[:]
+        del self.dish_codes[:]
+        self.dishes.clear()
+        self.descriptions.clear()
+        del self.dish_customers[:]
+        self.dish_tables.clear()
+        self.dish_counts.clear()
+        self.dish_weights.clear()
+        del self.table_slots[:]
+        self.free_tables.clear()
+        self._dish_index.clear()
+        self._by_dish = False
+        self.weights.clear()
+        self.num_customers = 0
+        self.num_tables = 0
+
+    @property
+    def tables(self):
+        return [Table(self, index) for index in range(len(self.counts))
+                if self.counts[index]]
+
+    def dish(self, index):
+        """Return the string served at a table."""
+        return self.dishes[self.dish_codes[index]]
+
+    def dish_code(self, dish):
+        """Return the code of a dish, adding it if it is new."""
+        code = self._dish_index.setdefault(dish, len(self.dishes))
+        if code == len(self.dishes):
+            self.dishes.append(dish)
+            self.descriptions.append(self.describe(dish))
+            self.dish_customers.append(0)
+            self.dish_tables.append(list())
+            if self._by_dish:
+                self.dish_counts.append(FenwickTree())
+                self.dish_weights.append(FenwickTree())
+        return code
+
+    def _index_dishes(self):
+        """Build the Fenwick trees of each dish's tables."""
+        self.table_slots = array("q", bytes(8 * len(self.counts)))
+        self.dish_counts.clear()
+        self.dish_weights.clear()
+        for tables in self.dish_tables:
+            counts, weights = FenwickTree(), FenwickTree()
+            for slot, index in enumerate(tables):
+                self.table_slots[index] = slot
+                counts.append(self.counts[index])
+                weights.append(self.counts[index] - self.alpha)
+            self.dish_counts.append(counts)
+            self.dish_weights.append(weights)
+        self._by_dish = True
+
+    def select_table(self, random_stream):
         # given a list of tables and num seated, pick either an existing table
-        # or a new table
-
-        # number of customers per table
-        num_customers_per_table = [table.num_customers for table in self.tables]
-        total_customers = sum(num_customers_per_table)
-        table_probabilities = [(table.num_customers - alpha) /
-                               (total_customers + beta)
-                               for table in self.tables]
-
-        target_number = random.random()
-        cum_prob = 0
-        for (table, table_prob) in zip(self.tables, table_probabilities):
-            cum_prob += table_prob
-            if target_number < cum_prob:
-                return table
-        return 'new'
-
-    def seat_new_customer(self):
-        table = self.select_table()
+        # or a new table; return the index of the table, or None for new
+
+        # existing tables have total probability
+        # (num_customers - alpha * num_tables) / (num_customers + beta)
+        target_number = (random_stream.random() *
+                         (self.num_customers + self.beta))
+        if target_number < self.num_customers - self.alpha * self.num_tables:
+            # guard against rounding error in the running sums
+            return min(self.weights.find(target_number), len(self.counts) - 1)
+        return None
+
+    def new_dish(self, random_stream):
+        """Draw a string for a new table."""
+        length = self.length
+        if length == "any":
+            length = random_stream.string_length(self.lambda_)
+        return random_stream.string(length, self.zero, self.one, self.p)
+
+    def describe(self, dish):
+        """Return what the simulation needs to know about a dish."""
+        return None
+
+    def _open_table(self, code):
+        """Seat a customer at a new table serving code; return its index."""
+        if self.free_tables:
+            index = self.free_tables.pop()
+            self.counts[index] = 1
+            self.dish_codes[index] = code
+            self.weights.add(index, 1 - self.alpha)
+        else:
+            index = len(self.counts)
+            self.counts.append(1)
+            self.dish_codes.append(code)
+            self.weights.append(1 - self.alpha)
+            if self._by_dish:
+                self.table_slots.append(0)
+        tables = self.dish_tables[code]
+        if self._by_dish:
+            self.table_slots[index] = len(tables)
+            self.dish_counts[code].append(1)
+            self.dish_weights[code].append(1 - self.alpha)
+        tables.append(index)
+        self.num_tables += 1
+        return index
+
+    def _join_table(self, index):
+        """Seat a customer at an existing table."""
+        self.counts[index] += 1
+        self.weights.add(index, 1)
+        if self._by_dish:
+            code, slot = self.dish_codes[index], self.table_slots[index]
+            self.dish_counts[code].add(slot, 1)
+            self.dish_weights[code].add(slot, 1)
+
+    def _leave_table(self, index):
+        """
+        Remove a customer from a table, closing it if it empties.
+
+        The dish trees must have been built.
+        """
+        self.counts[index] -= 1
+        code, slot = self.dish_codes[index], self.table_slots[index]
+        tables = self.dish_tables[code]
+        if self.counts[index]:
+            self.weights.add(index, -1)
+            self.dish_counts[code].add(slot, -1)
+            self.dish_weights[code].add(slot, -1)
+            return
+
+        # the table is empty: free it for a later new table, and move the
+        # dish's last table into its place
+        self.weights.add(index, self.alpha - 1)
+        self.free_tables.append(index)
+        self.num_tables -= 1
+        last = tables.pop()
+        if last != index:
+            tables[slot] = last
+            self.table_slots[last] = slot
+            for tree in (self.dish_counts[code], self.dish_weights[code]):
+                tree.add(slot, self.counts[last] - 1)
+        self.dish_counts[code].pop()
+        self.dish_weights[code].pop()
+
+    def seat(self, random_stream):
+        """Seat a customer and return the code of their dish."""
+        index = self.select_table(random_stream)
+
+        if index is None:
+            code = self.dish_code(self.new_dish(random_stream))
+            self._open_table(code)
+        else:
+            code = self.dish_codes[index]
+            self._join_table(index)
 
-        if table == 'new':
-            table = Table(self.length, self.zero, self.one)
-            self.tables.append(table)
+        self.dish_customers[code] += 1
+        self.num_customers += 1
+        return code
+
+    def seat_new_customer(self, random_stream):
+        return self.dishes[self.seat(random_stream)]
+
+    def predictive(self, dish, base_probability):
+        """
+        Return the probability that the next customer is served dish.
+
+        base_probability is the probability of dish under the base
+        distribution, from which new tables draw their dishes.
+        """
+        code = self._dish_index.get(dish)
+        existing = 0
+        if code is not None:
+            existing = (self.dish_customers[code] -
+                        self.alpha * len(self.dish_tables[code]))
+        new = (self.beta + self.alpha * self.num_tables) * base_probability
+        return (existing + new) / (self.num_customers + self.beta)
+
+    def add_customer(self, dish, base_probability, random_stream):
+        """Seat a customer who is to be served dish; return its code."""
+        if not self._by_dish:
+            self._index_dishes()
+        code = self.dish_code(dish)
+        tables = self.dish_tables[code]
+        existing = self.dish_customers[code] - self.alpha * len(tables)
+        new = (self.beta + self.alpha * self.num_tables) * base_probability
+        target_number = random_stream.random() * (existing + new)
+        if target_number < existing:
+            # guard against rounding error in the running sums
+            slot = min(self.dish_weights[code].find(target_number),
+                       len(tables) - 1)
+            self._join_table(tables[slot])
+        else:
+            self._open_table(code)
 
-        table.seat()
-        return table.string
+        self.dish_customers[code] += 1
+        self.num_customers += 1
+        return code
+
+    def remove_customer(self, dish, random_stream):
+        """Remove a customer served dish, picked uniformly at random."""
+        if not self._by_dish:
+            self._index_dishes()
+        code = self._dish_index[dish]
+        target_number = random_stream.random() * self.dish_customers[code]
+        slot = self.dish_counts[code].find(target_number)
+        self._leave_table(self.dish_tables[code][slot])
+        self.dish_customers[code] -= 1
+        self.num_customers -= 1
+
+    def log_probability(self, base_probability):
+        """
+        Return the log probability of the seating and the tables' dishes.
+
+        This is the Pitman-Yor exchangeable partition probability of the
+        table sizes times the base probability of each table's dish, where
+        base_probability is a function of the dish.
+        """
+        if not self.num_customers:
+            return 0.0
+        log_probability = (
+            sum(math.log(self.beta + i * self.alpha)
+                for i in range(1, self.num_tables)) -
+            math.lgamma(self.beta + self.num_customers) +
+            math.lgamma(self.beta + 1))
+        for count, code in zip(self.counts, self.dish_codes):
+            if count:
+                log_probability += (
+                    math.lgamma(count - self.alpha) -
+                    math.lgamma(1 - self.alpha) +
+                    math.log(base_probability(self.dishes[code])))
+        return log_probability
 
     def __str__(self):
-        if not self.tables:
+        if not self.num_tables:
             return f"Empty {self.type_} restaurant ({self.one}, {self.zero})"
         return "\t".join([str(table) for table in self.tables])
 
@@ -94,71 +371,156 @@ class Restaurant:
 class TemplateRestaurant(Restaurant):
     """A template restaurant."""
 
-    def __init__(self):
+    def __init__(self, alpha=alpha, beta=beta, lambda_=lambda_, p=p):
         self.type_ = "template"
         self.length = "any"
+        self.lambda_ = lambda_
         self.one = "r"
         self.zero = "s"
-        self.tables = list()
+        super().__init__(alpha, beta, p)
+
+    def describe(self, template):
+        """
+        Return the root length, residue length and number of runs.
+
+        A template of two runs (e.g. rrss) is concatenative, one of three
+        runs (e.g. rssr) is an infix, and any more are non-concatenative.
+        """
+        runs = 1 + sum(1 for a, b in zip(template, template[1:]) if a != b)
+        return (template.count(self.one), template.count(self.zero), runs)
+
+    def base_probability(self, template):
+        """
+        Return the probability that a new table draws template.
+
+        Its length is Poisson distributed, excluding 0, and each segment
+        is an r with probability p.
+        """
+        length = len(template)
+        ones = template.count(self.one)
+        return (math.exp(length * math.log(self.lambda_) - self.lambda_ -
+                         math.lgamma(length + 1)) /
+                (1 - math.exp(-self.lambda_)) *
+                self.p ** ones * (1 - self.p) ** (length - ones))
 
 
 class RootRestaurant(Restaurant):
     """A root restaurant."""
 
-    def __init__(self, length):
+    def __init__(self, length, alpha=alpha, beta=beta, p=p):
         """Morphemes must have a specific length associated with them."""
         self.type_ = "root"
         self.one = "C"
         self.zero = "V"
         self.length = length
-        self.tables = list()
+        super().__init__(alpha, beta, p)
+
+    def describe(self, morpheme):
+        return segment_class(morpheme)
 
 
 class ResidueRestaurant(Restaurant):
     """A morpheme restaurant."""
 
-    def __init__(self, length):
+    def __init__(self, length, alpha=alpha, beta=beta, p=p):
         """Morphemes must have a specific length associated with them."""
         self.type_ = "residue"
         self.one = "C"
         self.zero = "V"
         self.length = length
-        self.tables = list()
+        super().__init__(alpha, beta, p)
+
+    def describe(self, morpheme):
+        return segment_class(morpheme)
 
 
 class Simulation:
     """One pass of the simulation."""
-    template_restaurant = TemplateRestaurant()
-    root_restaurants = dict()  # length -> restaurant
-    residue_restaurants = dict()  # length -> restaurant
 
-    def simulate(self, n_words):
-        typologies = list()
-        while len(typologies) < n_words:
-            template = self.template_restaurant.seat_new_customer()
-            root_length = template.count('r')
-            residue_length = template.count('s')
+    def __init__(self, rng=None, alpha=alpha, beta=beta, lambda_=lambda_,
+                 p=p):
+        """
+        Draw all random numbers from rng, a numpy Generator.
+
+        Each simulation seats its customers in restaurants of its own,
+        so separate simulations are independent of each other. The
+        parameters default to the module-level values.
+        """
+        self.random_stream = RandomStream(rng)
+        self.parameters = dict(alpha=alpha, beta=beta, p=p)
+        self.template_restaurant = TemplateRestaurant(lambda_=lambda_,
+                                                      **self.parameters)
+        self.root_restaurants = dict()  # length -> restaurant
+        self.residue_restaurants = dict()  # length -> restaurant
+
+    def reset(self, rng=None):
+        """
+        Empty every restaurant and start drawing from rng.
+
+        The restaurants themselves are kept and reused, so running many
+        simulations one after another with one Simulation does not keep
+        reallocating them.
+        """
+        self.random_stream.reset(rng)
+        self.template_restaurant.reset()
+        for restaurant in self.root_restaurants.values():
+            restaurant.reset()
+        for restaurant in self.residue_restaurants.values():
+            restaurant.reset()
+
+    def root_restaurant(self, length):
+        """Return the restaurant of roots of length, opening it if new."""
+        if length not in self.root_restaurants:
+            self.root_restaurants[length] = RootRestaurant(
+                length, **self.parameters)
+        return self.root_restaurants[length]
+
+    def residue_restaurant(self, length):
+        """Return the restaurant of residues of length, opening it if new."""
+        if length not in self.residue_restaurants:
+            self.residue_restaurants[length] = ResidueRestaurant(
+                length, **self.parameters)
+        return self.residue_restaurants[length]
+
+    def words(self, n_words=None):
+        """
+        Generate (template, root, residue, typology) for each word in turn.
+
+        Words are sampled lazily, one per item, forever if n_words is None.
+        """
+        num_words = 0
+        while n_words is None or num_words < n_words:
+            template = self.template_restaurant.seat(self.random_stream)
+            root_length, residue_length, runs = (
+                self.template_restaurant.descriptions[template])
 
             if root_length == 0 or residue_length == 0:
                 continue
 
-            if root_length not in self.root_restaurants:
-                self.root_restaurants[root_length] = RootRestaurant(root_length)
-            root = self.root_restaurants[root_length].seat_new_customer()
+            root_restaurant = self.root_restaurant(root_length)
+            root = root_restaurant.seat(self.random_stream)
 
-            if residue_length not in self.residue_restaurants:
-                self.residue_restaurants[residue_length] = ResidueRestaurant(residue_length)
-            residue = self.residue_restaurants[residue_length].seat_new_customer()
+            residue_restaurant = self.residue_restaurant(residue_length)
+            residue = residue_restaurant.seat(self.random_stream)
 
             # characterize it
-            if re.match("^r+s+$", template) or re.match("^s+r+$", template):
-                typologies.append("concat")
-            elif re.match("^r+s+r+$", template) or re.match("^s+r+s+$", template):
-                typologies.append("infix")
+            num_words += 1
+            if runs == 2:
+                typology = "concat"
+            elif runs == 3:
+                typology = "infix"
             else:  # non-concat
-                if ((set(root) == {"C"} and set(residue) == {"V"}) or
-                   (set(root) == {"V"} and set(residue) == {"C"})):
-                    typologies.append("nonconcat_cv")
+                root_class = root_restaurant.descriptions[root]
+                residue_class = residue_restaurant.descriptions[residue]
+                if (root_class and residue_class and
+                   root_class != residue_class):
+                    typology = "nonconcat_cv"
                 else:
-                    typologies.append("unattested")
-        return Counter(typologies)
+                    typology = "unattested"
+            yield (self.template_restaurant.dishes[template],
+                   root_restaurant.dishes[root],
+                   residue_restaurant.dishes[residue],
+                   typology)
+
+    def simulate(self, n_words):
+        return Counter(typology for _, _, _, typology in self.words(n_words))
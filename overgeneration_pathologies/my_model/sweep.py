@@ -0,0 +1,196 @@
+"""
+Run count_simulations over a grid of model parameters.
+
+Each cell of the sweep is a setting of alpha, beta, lambda_ and p, and a
+number of words per language. Cells are given either as a full grid of
+values or as a Latin hypercube sample of ranges. The replicates of every
+cell are spread over a pool of worker processes, and each cell's counts
+are saved in the cache directory as soon as they are complete, under a
+hash of its parameters, number of runs and seed. Running a sweep again,
+say with a grid extended by another value of beta, only simulates the
+cells that are not in the cache. Without --seed, the counts are random,
+so nothing is cached.
+
+The results are written as a tab-separated table with one row per cell
+and threshold:
+
+    python sweep.py --alpha 0.5 0.9 --beta 1 5 --words 20 100 --seed 1
+    python sweep.py --latin-hypercube 50 --alpha 0.1 0.9 --beta 1 10 \\
+        --words 100 --seed 1 --output results.tsv
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import itertools
+import json
+import os
+import sys
+import numpy as np
+from count_simulations import THRESHOLDS, run_batch, seed_batches
+import simulation
+
+PARAMETERS = ("alpha", "beta", "lambda_", "p")
+
+
+def make_cell(num_words, **parameters):
+    """Return a cell, with parameters not given set to their defaults."""
+    cell = {name: float(parameters.get(name, getattr(simulation, name)))
+            for name in PARAMETERS}
+    cell["num_words"] = int(num_words)
+    return cell
+
+
+def grid(num_words, **values):
+    """
+    Return a cell for every combination of values.
+
+    values maps each parameter to a list of values; parameters left out
+    keep their default value.
+    """
+    names = list(values)
+    return [make_cell(words, **dict(zip(names, combination)))
+            for words in num_words
+            for combination in itertools.product(*values.values())]
+
+
+def latin_hypercube(num_cells, num_words, rng=None, **ranges):
+    """
+    Return a Latin hypercube sample of cells for each number of words.
+
+    ranges maps each parameter to a (low, high) pair; the range of each is
+    split into num_cells equal strata, and every stratum is sampled once.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    samples = dict()
+    for name, (low, high) in ranges.items():
+        strata = rng.permutation(num_cells) + rng.random(num_cells)
+        samples[name] = low + (high - low) * strata / num_cells
+    return [make_cell(words, **{name: samples[name][i] for name in ranges})
+            for words in num_words for i in range(num_cells)]
+
+
+def cell_key(cell, num_runs, seed):
+    """Return the hash identifying the results of a cell."""
+    description = dict(cell, num_runs=num_runs, seed=seed)
+    return hashlib.sha1(
+        json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def load_cell(cache_dir, key):
+    """Return the cached counts of a cell, or None if there are none."""
+    path = os.path.join(cache_dir, key + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as cell_file:
+        return np.array(json.load(cell_file)["counts"], dtype=np.int64)
+
+
+def save_cell(cache_dir, key, cell, num_runs, seed, counts):
+    """Save the counts of a cell to the cache."""
+    path = os.path.join(cache_dir, key + ".json")
+    with open(path + ".tmp", "w") as cell_file:
+        json.dump({"cell": cell, "num_runs": num_runs, "seed": seed,
+                   "counts": [int(count) for count in counts]}, cell_file)
+    os.replace(path + ".tmp", path)
+
+
+def run_sweep(cells, num_runs, cache_dir, seed=None, workers=1,
+              batch_size=100):
+    """
+    Return the threshold counts of num_runs simulations for each cell.
+
+    Cells found in cache_dir are not simulated again. Each cell's random
+    numbers are seeded by its hash, so its counts are the same however
+    the grid it is part of is made up. With no seed, they are random, and
+    the cache is neither read nor written.
+    """
+    cached = seed is not None
+    if cached:
+        os.makedirs(cache_dir, exist_ok=True)
+    keys = [cell_key(cell, num_runs, seed) for cell in cells]
+    results = [load_cell(cache_dir, key) if cached else None
+               for key in keys]
+
+    jobs = list()  # (cell index, batch of seeds)
+    for i, (cell, key) in enumerate(zip(cells, keys)):
+        if results[i] is None:
+            cell_seed = int(key, 16) if cached else None
+            jobs.extend((i, batch) for batch in
+                        seed_batches(num_runs, cell_seed, batch_size))
+    if not jobs:
+        return results
+
+    remaining = Counter(i for i, _ in jobs)
+    partial = {i: np.zeros(len(THRESHOLDS), dtype=np.int64)
+               for i in remaining}
+    arguments = ([batch for _, batch in jobs],
+                 [cells[i]["num_words"] for i, _ in jobs],
+                 [{name: cells[i][name] for name in PARAMETERS}
+                  for i, _ in jobs])
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        batch_counts = (executor.map(run_batch, *arguments) if executor
+                        else map(run_batch, *arguments))
+        # batches come back in order, so each cell is saved once its
+        # last batch is in
+        for (i, _), counts in zip(jobs, batch_counts):
+            partial[i] += counts
+            remaining[i] -= 1
+            if not remaining[i]:
+                results[i] = partial.pop(i)
+                if cached:
+                    save_cell(cache_dir, keys[i], cells[i], num_runs, seed,
+                              results[i])
+    finally:
+        if executor:
+            executor.shutdown()
+    return results
+
+
+def write_results(cells, results, num_runs, results_file):
+    """Write the results of a sweep as a tab-separated table."""
+    columns = PARAMETERS + ("num_words", "num_runs", "threshold", "count",
+                            "proportion")
+    print("\t".join(columns), file=results_file)
+    for cell, counts in zip(cells, results):
+        for threshold, count in zip(THRESHOLDS, counts):
+            row = [cell[name] for name in PARAMETERS] + [
+                cell["num_words"], num_runs, threshold, count,
+                count / num_runs]
+            print("\t".join(str(value) for value in row), file=results_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    for name in PARAMETERS:
+        parser.add_argument("--" + name.rstrip("_"), dest=name, type=float,
+                            nargs="+")
+    parser.add_argument("--words", type=int, nargs="+", default=[100])
+    parser.add_argument("--latin-hypercube", type=int, metavar="CELLS",
+                        help="sample CELLS cells, taking each parameter "
+                             "given as a range LOW HIGH")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache", default="sweep_cache")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    values = {name: getattr(args, name) for name in PARAMETERS
+              if getattr(args, name) is not None}
+    if args.latin_hypercube:
+        cells = latin_hypercube(args.latin_hypercube, args.words,
+                                np.random.default_rng(args.seed), **values)
+    else:
+        cells = grid(args.words, **values)
+
+    results = run_sweep(cells, args.runs, args.cache, args.seed,
+                        args.workers)
+    if args.output:
+        with open(args.output, "w") as results_file:
+            write_results(cells, results, args.runs, results_file)
+    else:
+        write_results(cells, results, args.runs, sys.stdout)
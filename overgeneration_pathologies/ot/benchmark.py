@@ -0,0 +1,87 @@
+"""
+Measure how the typology pipeline scales with the length of the stem.
+
+For each stem length, every split into a root and a residue is timed:
+generating the inputs, generating their candidates, building the
+ViolationMatrix, and evaluating every ranking of the default constraints.
+Stems are 60% consonants, as in CCCVV.
+
+    python benchmark.py --min-length 5 --max-length 10 --engine tree
+
+Output is a tab-separated table with a row per stem length and split. A
+stem length is skipped once a split at a shorter length took longer than
+--max-seconds, as the next would take longer still.
+"""
+
+import argparse
+import math
+import time
+from gen import Gen, all_splits
+from run_typologies import default_constraint_rankings
+from typology import build_violation_matrix, count_typologies
+
+COLUMNS = ("stem", "root_length", "inputs", "candidates", "rankings",
+           "inputs_per_s", "candidates_per_s", "matrix_s", "rankings_per_s")
+
+
+def stem_segments(length):
+    """Return a stem of length segments, 60% of them consonants."""
+    num_consonants = math.ceil(0.6 * length)
+    return "C" * num_consonants + "V" * (length - num_consonants)
+
+
+def benchmark_split(gen, rankings, engine="tree"):
+    """Return the row of measurements for one Gen."""
+    start = time.perf_counter()
+    inputs = list(gen.inputs())
+    input_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    num_candidates = sum(len(gen.candidates(input)) for input in inputs)
+    candidate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = (build_violation_matrix(rankings, gen)
+              if engine != "tableau" else None)
+    matrix_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in count_typologies(rankings, engine, matrix, gen):
+        pass
+    ranking_time = time.perf_counter() - start
+
+    return (gen.segments, gen.root_length, len(inputs), num_candidates,
+            len(rankings), len(inputs) / input_time,
+            num_candidates / candidate_time, matrix_time,
+            len(rankings) / ranking_time)
+
+
+def run_benchmark(min_length=5, max_length=10, engine="tree",
+                  max_seconds=600):
+    """Yield rows of measurements for stem lengths in turn."""
+    rankings = list(default_constraint_rankings())
+    for length in range(min_length, max_length + 1):
+        slowest = 0
+        for gen in all_splits(stem_segments(length),
+                              cache_size=math.comb(length, length // 2)):
+            start = time.perf_counter()
+            yield benchmark_split(gen, rankings, engine)
+            slowest = max(slowest, time.perf_counter() - start)
+        if slowest > max_seconds:
+            return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--min-length", type=int, default=5)
+    parser.add_argument("--max-length", type=int, default=10)
+    parser.add_argument("--engine", default="tree",
+                        choices=["tableau", "matrix", "tree"])
+    parser.add_argument("--max-seconds", type=float, default=600)
+    args = parser.parse_args()
+
+    print("\t".join(COLUMNS))
+    for row in run_benchmark(args.min_length, args.max_length, args.engine,
+                             args.max_seconds):
+        print("\t".join(f"{value:.4g}" if isinstance(value, float)
+                        else str(value) for value in row), flush=True)
@@ -1,5 +1,7 @@
 """Class defining the set of relevant OT constraints and possible rankings."""
 
+import numpy as np
+
 LIST_OF_CONSTRAINTS = ['contiguity', 'c_adj_v',
                        'align_left_root', 'align_left_residue',
                        'align_right_root', 'align_right_residue']
@@ -8,17 +10,39 @@ LIST_OF_CONSTRAINTS = ['contiguity', 'c_adj_v',
 class ConstraintSet:
     """Implements constraints."""
 
-    def __init__(self, constraints=LIST_OF_CONSTRAINTS):
-        """Initialize list of constraints."""
+    def __init__(self, constraints=LIST_OF_CONSTRAINTS, encoded=False):
+        """
+        Initialize list of constraints.
+
+        If encoded, candidates are tuples of integer segment codes
+        (see segments.py) rather than strings like 'C1'.
+
+        Each constraint may also have a batch version, named with a
+        _batch suffix, which scores all the candidates for an input at once.
+        It takes a 2-D array of encoded candidates, one per row, with
+        encoded inputs, and returns a vector of violations. The batch
+        versions are collected in self.batch_constraints (None where a
+        constraint has no batch version).
+        """
         self.constraint_strings = constraints
+        self.encoded = encoded
+        if encoded:
+            self._is_consonant = self._is_consonant_code
         self.constraints = list()
+        self.batch_constraints = list()
         for constraint in constraints:
             self.constraints.append(getattr(self, constraint))
+            self.batch_constraints.append(
+                getattr(self, constraint + '_batch', None))
 
     def _is_consonant(self, segment):
         """Return True if segment is of the form C1, C2, C3."""
         return segment[0] == 'C'
 
+    def _is_consonant_code(self, segment):
+        """Return True if segment is the integer code of a consonant."""
+        return segment & 1
+
     def c_adj_v(self, candidate, inputs=None):
         """
         Implement the C//V constraint.
@@ -155,6 +179,81 @@ class ConstraintSet:
         return (len(set(contig_input) -
                     set(contig_candidate)))
 
+    # -------------------------------------------------------------
+    # Batch versions of the constraints over arrays of candidates.
+    # The scalar versions above are the reference implementations.
+    # -------------------------------------------------------------
+
+    def c_adj_v_batch(self, candidates, inputs=None):
+        """Implement the C//V constraint over an array of candidates."""
+        consonant = (candidates & 1).astype(bool)
+        # a missing neighbour at either edge counts as a C
+        left = np.ones_like(consonant)
+        left[:, 1:] = consonant[:, :-1]
+        right = np.ones_like(consonant)
+        right[:, :-1] = consonant[:, 1:]
+        return (consonant & left & right).sum(axis=1)
+
+    def align_left_root_batch(self, candidates, inputs):
+        """Implement ALIGN(Root, Left, Stem, Left) over candidates."""
+        root, residue = inputs
+        return np.argmax(candidates == root[0], axis=1)
+
+    def align_left_residue_batch(self, candidates, inputs):
+        """Implement ALIGN(Residue, Left, Stem, Left) over candidates."""
+        root, residue = inputs
+        return np.argmax(candidates == residue[0], axis=1)
+
+    def align_right_root_batch(self, candidates, inputs):
+        """Implement ALIGN(Root, Right, Stem, Right) over candidates."""
+        root, residue = inputs
+        return (candidates.shape[1] - 1 -
+                np.argmax(candidates == root[-1], axis=1))
+
+    def align_right_residue_batch(self, candidates, inputs):
+        """Implement ALIGN(Residue, Right, Stem, Right) over candidates."""
+        root, residue = inputs
+        return (candidates.shape[1] - 1 -
+                np.argmax(candidates == residue[-1], axis=1))
+
+    def anchor_left_root_batch(self, candidates, inputs):
+        """Implement categorical ALIGN(Root, Left) over candidates."""
+        root, residue = inputs
+        return (candidates[:, 0] != root[0]).astype(int)
+
+    def anchor_left_residue_batch(self, candidates, inputs):
+        """Implement categorical ALIGN(Residue, Left) over candidates."""
+        root, residue = inputs
+        return (candidates[:, 0] != residue[0]).astype(int)
+
+    def anchor_right_root_batch(self, candidates, inputs):
+        """Implement categorical ALIGN(Root, Right) over candidates."""
+        root, residue = inputs
+        return (candidates[:, -1] != root[-1]).astype(int)
+
+    def anchor_right_residue_batch(self, candidates, inputs):
+        """Implement categorical ALIGN(Residue, Right) over candidates."""
+        root, residue = inputs
+        return (candidates[:, -1] != residue[-1]).astype(int)
+
+    def contiguity_batch(self, candidates, inputs):
+        """
+        Implement the CONTIGUITY constraint over an array of candidates.
+
+        Each adjacent pair of segments is packed into a single integer,
+        so the pairs of the input are looked up in every candidate at once.
+        Segments occur only once each, so no pair is counted twice.
+        """
+        root, res = inputs
+        base = int(candidates.max()) + 1
+        contig_input = [first * base + second
+                        for morpheme in (root, res)
+                        for first, second in zip(morpheme, morpheme[1:])]
+
+        contig_candidate = candidates[:, :-1] * base + candidates[:, 1:]
+        return (len(contig_input) -
+                np.isin(contig_candidate, contig_input).sum(axis=1))
+
     def __str__(self):
         """Create a nice representation of the constraints."""
         return ' >> '.join(self.constraint_strings)
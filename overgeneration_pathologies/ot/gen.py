@@ -1,58 +1,134 @@
 """Function for generating possible inputs and output candidates."""
 
-import itertools
+from collections import OrderedDict
+from functools import lru_cache
+from segments import encode
+
+
+def multiset_permutations(items):
+    """
+    Generate the distinct permutations of items in lexicographic order.
+
+    This is Knuth's Algorithm L (TAOCP 7.2.1.2), which steps from each
+    permutation to the next directly, so repeated items never give rise
+    to duplicates that have to be generated and thrown away.
+    """
+    a = sorted(items)
+    n = len(a)
+    while True:
+        yield tuple(a)
+
+        # find the last position j that can be increased
+        j = n - 2
+        while j >= 0 and a[j] >= a[j + 1]:
+            j -= 1
+        if j < 0:
+            return
+
+        # increase it by the smallest larger item after it
+        l = n - 1
+        while a[j] >= a[l]:
+            l -= 1
+        a[j], a[l] = a[l], a[j]
+
+        # and put the items after it back in increasing order
+        a[j + 1:] = reversed(a[j + 1:])
+
+
+@lru_cache(maxsize=128)
+def interleave_templates(root_length, residue_length):
+    """
+    Return every way of interleaving a root and a residue.
+
+    Each template is a tuple of 0s (root) and 1s (residue) in output order.
+    """
+    return tuple(multiset_permutations([0] * root_length +
+                                       [1] * residue_length))
 
 
 class Gen:
     """Generate possible inputs and output candidates."""
 
-    def __init__(self, segments='CCCVV', root_length=3):
-        """Initialize the list of segments."""
-        # residue should be at least 1 segment long
-        assert(root_length < len(segments))
+    def __init__(self, segments='CCCVV', root_length=3, cache_size=4096,
+                 encoded=False):
+        """
+        Initialize the list of segments.
+
+        If encoded, segments are integer codes (see segments.py) rather
+        than strings like 'C1'. The candidates of up to cache_size inputs
+        are remembered, least recently used first out. A Gen is pickled
+        along with its cache, so after precompute() it can be handed to
+        worker processes as is.
+        """
+        # root and residue should be at least 1 segment long
+        assert(0 < root_length < len(segments))
 
         self.segments = segments
         self.root_length = root_length
         self.residue_length = len(segments) - root_length
+        self.cache_size = cache_size
+        self.encoded = encoded
+        self._candidate_cache = OrderedDict()
 
     def inputs(self):
         """
         Generate roots and residues of appropriate length from self.segments.
 
         C's and V's are numbered in the order they appear.
+        Inputs are generated one at a time, in sorted order.
         """
-        # there's a better algorithm (Knuth's L-algorithm)
-        # that generates this without duplications but isn't worth the effort
-        possible_stems = sorted(set(itertools.permutations(self.segments)))
-
-        # number the segments in the order they appear
-        numbered_stems = [[seg + str(i+1) for i, seg in enumerate(stem)]
-                          for stem in possible_stems]
-
-        return [(tuple(stem[:self.root_length]),
-                 tuple(stem[self.root_length:])) for stem in numbered_stems]
+        for stem in multiset_permutations(self.segments):
+            # number the segments in the order they appear
+            numbered_stem = tuple(seg + str(i+1)
+                                  for i, seg in enumerate(stem))
+            if self.encoded:
+                numbered_stem = encode(numbered_stem)
+            yield (numbered_stem[:self.root_length],
+                   numbered_stem[self.root_length:])
 
     def candidates(self, input):
         """
         Generate candidates for a given input.
 
+        The candidates are returned as a tuple, which is cached.
+
         Assumptions:
         * MAX and DEP are undominated - no deletions or insertions generated
         * LINEARITY is undominated - no re-ordering of segments within a root
                                      or within a residue, although they may be
                                      interleaved non-concatenatively.
         """
+        if input in self._candidate_cache:
+            self._candidate_cache.move_to_end(input)
+            return self._candidate_cache[input]
+
         (root, residue) = input
         assert self.root_length == len(root)
         assert self.residue_length == len(residue)
 
-        templates = sorted(set(
-                           itertools.permutations([0] * self.root_length +
-                                                  [1] * self.residue_length)))
-        return [self._interleave(root, residue, template)
-                for template in templates]
+        templates = interleave_templates(self.root_length,
+                                         self.residue_length)
+        candidates = tuple(self._interleave(root, residue, template)
+                           for template in templates)
+
+        self._candidate_cache[input] = candidates
+        if len(self._candidate_cache) > self.cache_size:
+            self._candidate_cache.popitem(last=False)
+        return candidates
+
+    def precompute(self):
+        """Fill the cache with the candidates of every input."""
+        for inputs in self.inputs():
+            self.candidates(inputs)
+        return self
 
     def _interleave(self, arr1, arr2, template):
         """Interleave two strings given a template."""
         iters = [iter(arr1), iter(arr2)]
         return tuple(next(iters[i]) for i in template)
+
+
+def all_splits(segments, **kwargs):
+    """Return a Gen for every split of segments into a root and residue."""
+    return [Gen(segments, root_length, **kwargs)
+            for root_length in range(1, len(segments))]
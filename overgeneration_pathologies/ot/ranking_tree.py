@@ -0,0 +1,68 @@
+"""Evaluate a set of rankings as a prefix tree over their constraints."""
+
+
+class RankingTree:
+    """
+    A trie of constraint rankings.
+
+    Rankings that share a prefix share the work of filtering candidates
+    by that prefix. Once a prefix leaves a single winner for every input,
+    the constraints ranked below it cannot change the outcome, so the
+    result is assigned to every ranking in that subtree at once.
+    """
+
+    def __init__(self, rankings):
+        """Initialize the rankings, each a sequence of constraint names."""
+        self.rankings = [tuple(ranking) for ranking in rankings]
+        self.num_filters = 0
+        self.num_evaluations = 0
+
+    def evaluate(self, matrix, function):
+        """
+        Apply function to the winners of each ranking.
+
+        The winners are given to function as the boolean mask of
+        ViolationMatrix.winners, and function is called once per decisive
+        prefix rather than once per ranking. Return the results in the
+        order of the rankings.
+        """
+        self.num_filters = 0
+        self.num_evaluations = 0
+        results = [None] * len(self.rankings)
+        viable = matrix.winners(())
+        self._descend(matrix, function, range(len(self.rankings)), 0,
+                      viable, results)
+        return results
+
+    def _descend(self, matrix, function, members, depth, viable, results):
+        """Evaluate the rankings in members, which share a prefix of depth."""
+        if matrix.is_decisive(viable):
+            self._assign(function, members, viable, results)
+            return
+
+        finished = [i for i in members if len(self.rankings[i]) == depth]
+        if finished:
+            self._assign(function, finished, viable, results)
+
+        # group the remaining rankings by their next constraint,
+        # in the order in which each constraint is first seen
+        children = dict()
+        for i in members:
+            if len(self.rankings[i]) > depth:
+                children.setdefault(self.rankings[i][depth], []).append(i)
+
+        for constraint, child_members in children.items():
+            self.num_filters += 1
+            self._descend(matrix, function, child_members, depth + 1,
+                          matrix.filter(viable, constraint), results)
+
+    def _assign(self, function, members, viable, results):
+        """Give every ranking in members the result for viable."""
+        self.num_evaluations += 1
+        result = function(viable)
+        for i in members:
+            results[i] = result
+
+    def __len__(self):
+        """Define the length as the number of rankings."""
+        return len(self.rankings)
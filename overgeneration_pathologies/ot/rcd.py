@@ -0,0 +1,151 @@
+"""
+Compute a factorial typology directly with Recursive Constraint Demotion.
+
+Instead of running every ranking, languages are built up one input at a
+time. Choosing a winner for an input amounts to a set of Elementary
+Ranking Conditions (ERCs) against its other candidates, and a partial
+language is kept only while RCD finds its ERCs consistent. The work
+grows with the number of languages rather than with n! rankings.
+
+An ERC is stored as a pair of bitmasks (W, L) over the constraints:
+bit j of W (L) is set if constraint j prefers the winner (loser).
+A ranking satisfies an ERC if its highest-ranked constraint in W | L is in W.
+"""
+
+import numpy as np
+
+
+def is_consistent(ercs, num_constraints):
+    """Return True if some ranking satisfies all the ERCs (by RCD)."""
+    unranked = (1 << num_constraints) - 1
+    while ercs:
+        # constraints that prefer no loser can be ranked next
+        losers = 0
+        for _, l in ercs:
+            losers |= l
+        stratum = unranked & ~losers
+        if not stratum:
+            return False
+        ercs = [(w, l) for w, l in ercs if not w & stratum]
+        unranked &= ~stratum
+    return True
+
+
+def count_rankings(ercs, num_constraints):
+    """
+    Count the total rankings of the constraints that satisfy all the ERCs.
+
+    Rankings are built from the top down; constraint j may be placed next
+    unless an ERC not yet decided by the constraints placed so far would
+    then be decided in favour of the loser.
+    """
+    counts = {0: 1}
+    for placed in range(1 << num_constraints):
+        count = counts.pop(placed, 0)
+        if not count:
+            continue
+        forbidden = placed
+        for w, l in ercs:
+            if not (w | l) & placed:
+                forbidden |= l
+        for j in range(num_constraints):
+            bit = 1 << j
+            if not forbidden & bit:
+                counts[placed | bit] = counts.get(placed | bit, 0) + count
+    return count
+
+
+class Language:
+    """One language of the factorial typology."""
+
+    def __init__(self, matrix, rows, ercs, num_rankings):
+        """Initialize the winning rows per input and the rankings count."""
+        self.viable = np.zeros(len(matrix), dtype=bool)
+        for winner_rows in rows:
+            self.viable[winner_rows] = True
+        self.winners = [[matrix.candidates[row] for row in winner_rows]
+                        for winner_rows in rows]
+        self.ercs = ercs
+        self.num_rankings = num_rankings
+
+
+class FactorialTypology:
+    """
+    Enumerate the languages that some ranking of the constraints produces.
+
+    The violations are taken from a ViolationMatrix; candidates with the
+    same violations on every constraint tie under all rankings and so are
+    treated as a single joint winner.
+    """
+
+    def __init__(self, matrix, constraints=None, dominations=()):
+        """
+        Initialize the typology over constraints (all of matrix by default).
+
+        dominations is a sequence of (higher, lower) constraint pairs that
+        every ranking must respect.
+        """
+        self.matrix = matrix
+        if constraints is None:
+            constraints = matrix.constraint_strings
+        self.constraint_strings = list(constraints)
+        self.num_constraints = len(self.constraint_strings)
+        self.dominations = [
+            (1 << self.constraint_strings.index(higher),
+             1 << self.constraint_strings.index(lower))
+            for higher, lower in dominations]
+
+    def _classes(self, input_index):
+        """
+        Group the candidates of an input by their violation profile.
+
+        Return the candidate rows of each group and the profile matrix.
+        """
+        start = self.matrix.offsets[input_index]
+        stop = (self.matrix.offsets[input_index + 1]
+                if input_index + 1 < len(self.matrix.offsets)
+                else len(self.matrix))
+        columns = [self.matrix.columns[constraint]
+                   for constraint in self.constraint_strings]
+        violations = self.matrix.violations[start:stop][:, columns]
+        profiles, inverse = np.unique(violations, axis=0,
+                                      return_inverse=True)
+        inverse = inverse.reshape(-1)
+        rows = [list(start + np.flatnonzero(inverse == k))
+                for k in range(len(profiles))]
+        return rows, profiles
+
+    def _winner_ercs(self, profiles):
+        """Return, for each profile as winner, its ERCs against the others."""
+        bits = 1 << np.arange(self.num_constraints, dtype=np.int64)
+        ercs = list()
+        for winner in profiles:
+            difference = profiles - winner
+            w = (difference > 0) @ bits
+            l = (difference < 0) @ bits
+            # ERCs without an L are satisfied by every ranking
+            ercs.append([(int(wk), int(lk)) for wk, lk in zip(w, l) if lk])
+        return ercs
+
+    def languages(self):
+        """Return every language producible by some ranking."""
+        partial = [(list(), list(self.dominations))]
+        if not is_consistent(self.dominations, self.num_constraints):
+            return list()
+
+        for i in range(len(self.matrix.inputs)):
+            rows, profiles = self._classes(i)
+            extended = list()
+            winner_ercs = self._winner_ercs(profiles)
+            for winners, ercs in partial:
+                known = set(ercs)
+                for winner_rows, new_ercs in zip(rows, winner_ercs):
+                    combined = ercs + [erc for erc in new_ercs
+                                       if erc not in known]
+                    if is_consistent(combined, self.num_constraints):
+                        extended.append((winners + [winner_rows], combined))
+            partial = extended
+
+        return [Language(self.matrix, winners, ercs,
+                         count_rankings(ercs, self.num_constraints))
+                for winners, ercs in partial]
@@ -1,7 +1,10 @@
 """Run typologies."""
 
 import itertools
-from typology import print_full_typology, print_count_typology
+import os
+from typology import (print_full_typology, print_count_typology,
+                      print_language_typology, print_split_typologies,
+                      write_full_typology)
 
 
 #  Define the various constraint sets and possible rankings.
@@ -56,25 +59,42 @@ def zukoff_suffix_rankings():
 #    MAIN
 # -------------
 
-# for ranking_type in ["default_constraint_rankings",
-#                      "categorical_align_constraint_rankings",
-#                      "zukoff_prefix_rankings",
-#                      "zukoff_suffix_rankings"]:
-#     rankings = locals()[ranking_type]()
-#     print(ranking_type)
-#     print("-"*50)
-#     print_count_typology(rankings)
-#     print("\n\n\n")
-
-
-for ranking_type in [
-#                    "default_constraint_rankings",
-                     "categorical_align_constraint_rankings"
-#                     "zukoff_prefix_rankings",
-#                     "zukoff_suffix_rankings"
-                    ]:
-    rankings = locals()[ranking_type]()
-    print(ranking_type)
-    print("-"*50)
-    print_full_typology(rankings)
-    print("\n\n\n")
+if __name__ == "__main__":
+    # rankings are sharded across this many processes
+    workers = os.cpu_count()
+
+    # for ranking_type in ["default_constraint_rankings",
+    #                      "categorical_align_constraint_rankings",
+    #                      "zukoff_prefix_rankings",
+    #                      "zukoff_suffix_rankings"]:
+    #     rankings = locals()[ranking_type]()
+    #     print(ranking_type)
+    #     print("-"*50)
+    #     print_count_typology(rankings, workers=workers)
+    #     print("\n\n\n")
+
+    # Languages can also be found directly, without enumerating rankings:
+    # print_language_typology(['contiguity', 'c_adj_v',
+    #                          'align_left_residue', 'align_left_root',
+    #                          'align_right_root'],
+    #                         [('align_left_residue', 'align_left_root')])
+
+    # Other stems can be split into a root and residue in every way:
+    # print_split_typologies(default_constraint_rankings(), 'CCCCVV',
+    #                        workers=workers)
+
+    # For long runs, stream to a file that can be resumed if interrupted:
+    # write_full_typology(default_constraint_rankings(),
+    #                     "all_tableaux.jsonl.gz", workers=workers)
+
+    for ranking_type in [
+    #                    "default_constraint_rankings",
+                         "categorical_align_constraint_rankings"
+    #                     "zukoff_prefix_rankings",
+    #                     "zukoff_suffix_rankings"
+                        ]:
+        rankings = locals()[ranking_type]()
+        print(ranking_type)
+        print("-"*50)
+        print_full_typology(rankings, workers=workers)
+        print("\n\n\n")
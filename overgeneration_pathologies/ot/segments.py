@@ -0,0 +1,36 @@
+"""
+Compact integer codes for numbered segments such as 'C1' and 'V4'.
+
+A segment's number is shifted left by one bit and its lowest bit is set
+for a consonant, so 'C1' is 3 and 'V4' is 8. Codes are small ints, which
+are cheap to store, hash and compare; the readable names are only needed
+for printing.
+"""
+
+
+def encode_segment(segment):
+    """Return the integer code of a segment name like 'C3'."""
+    return int(segment[1:]) << 1 | (segment[0] == 'C')
+
+
+def decode_segment(code):
+    """Return the segment name of an integer code."""
+    return ('C' if code & 1 else 'V') + str(code >> 1)
+
+
+def encode(segments):
+    """Return the integer codes of a tuple of segment names."""
+    return tuple(encode_segment(segment) for segment in segments)
+
+
+def decode(segments):
+    """Return the names of a tuple of segments, whether encoded or not."""
+    return tuple(decode_segment(segment) if isinstance(segment, int)
+                 else segment for segment in segments)
+
+
+def is_consonant(segment):
+    """Return True if a segment, encoded or not, is a consonant."""
+    if isinstance(segment, int):
+        return bool(segment & 1)
+    return segment[0] == 'C'
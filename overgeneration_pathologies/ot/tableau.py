@@ -1,6 +1,29 @@
 """Run a tableau and identify the winning candidate(s)."""
 
 from collections import defaultdict
+from segments import decode, is_consonant
+
+TYPOLOGIES = ('concat_suffix', 'concat_prefix', 'infix',
+              'nonconcat_cv', 'unattested')
+
+
+def winner_typology(inputs, winner):
+    """Determine the type of a single winner for the given (root, residue)."""
+    root, residue = inputs
+    if winner == root + residue:
+        return 'concat_suffix'
+    if winner == residue + root:
+        return 'concat_prefix'
+    if any(winner[i:i + len(residue)] == residue
+           for i in range(len(winner) - len(residue) + 1)):
+        return 'infix'
+    # a root of only consonants and a residue of only vowels, or vice versa
+    root_consonants = [is_consonant(segment) for segment in root]
+    residue_consonants = [is_consonant(segment) for segment in residue]
+    if ((all(root_consonants) and not any(residue_consonants)) or
+       (all(residue_consonants) and not any(root_consonants))):
+        return 'nonconcat_cv'
+    return 'unattested'
 
 
 class Tableau:
@@ -11,6 +34,7 @@ class Tableau:
         self.root, self.residue = inputs
         self.ranked_constraints = ranked_constraints
         self.candidates = candidates
+        self._violation_table = None
 
         self._execute()
 
@@ -18,17 +42,51 @@ class Tableau:
         """
         Execute the Optimality Theory algorithm.
 
-        Identify winning candidate(s) and populate violations table.
+        Identify winning candidate(s). Each constraint is evaluated once
+        on each candidate still in the running, and evaluation stops as
+        soon as a single candidate is left.
         """
+        viable_candidates = list(self.candidates)
+        inputs = (self.root, self.residue)
+
+        for constraint in self.ranked_constraints:
+            if len(viable_candidates) == 1:
+                break
+            num_violations = [constraint(candidate, inputs)
+                              for candidate in viable_candidates]
+            min_violation = min(num_violations)
+            viable_candidates = [
+                candidate for candidate, violations
+                in zip(viable_candidates, num_violations)
+                if violations == min_violation]
+
+        # after everything, the candidate(s) left is/are the winner(s)
+        self.winners = viable_candidates
+
+    @property
+    def violation_table(self):
+        """
+        Return the violations string of every candidate on every constraint.
+
+        The table is only needed for printing, so it is built on first use.
+        """
+        if self._violation_table is None:
+            self._violation_table = self._render_violations()
+        return self._violation_table
+
+    def _render_violations(self):
+        """Build the violations table, with ! where a candidate is ruled out."""
         violations = defaultdict(list)
         viable_candidates = set(self.candidates)
         inputs = (self.root, self.residue)
 
         for constraint in self.ranked_constraints:
-            min_violation = min(constraint(candidate, inputs)
+            all_violations = {candidate: constraint(candidate, inputs)
+                              for candidate in self.candidates}
+            min_violation = min(all_violations[candidate]
                                 for candidate in viable_candidates)
             for candidate in self.candidates:
-                num_violations = constraint(candidate, inputs)
+                num_violations = all_violations[candidate]
                 num_violations_string = "*" * num_violations
                 if num_violations > min_violation:
                     if candidate in viable_candidates:
@@ -42,21 +100,11 @@ class Tableau:
                                                         min_violation - 1))
                 violations[candidate].append(num_violations_string)
 
-        # after everything, the candidate(s) left is/are the winner(s)
-        self.winners = list(viable_candidates)
-        self.violation_table = violations
+        return violations
 
     def typology_single(self, winner):
         """Determine type of a single winner."""
-        if winner == self.root + self.residue:
-            return 'concat_suffix'
-        if winner == self.residue + self.root:
-            return 'concat_prefix'
-        if ''.join(self.residue) in ''.join(winner):
-            return 'infix'
-        if self.residue[0][0] == 'V' and self.residue[1][0] == 'V':
-            return 'nonconcat_cv'
-        return 'unattested'
+        return winner_typology((self.root, self.residue), winner)
 
     @property
     def typology(self):
@@ -76,16 +124,16 @@ class Tableau:
     def __repr__(self):
         """Print out a nice tableau."""
         format_string = "{:20} " * (len(self.ranked_constraints) + 1)
-        root, res = "".join(self.root), "".join(self.residue)
+        root, res = "".join(decode(self.root)), "".join(decode(self.residue))
         constraint_line = ["/{},{}/".format(root, res)]
         constraint_line.extend(self.ranked_constraints.constraint_strings)
         string = format_string.format(*constraint_line)
         string += "\n"
         for candidate in self.candidates:
             if candidate in self.winners:
-                tableau_line = ["> " + "".join(candidate)]
+                tableau_line = ["> " + "".join(decode(candidate))]
             else:
-                tableau_line = ["  " + "".join(candidate)]
+                tableau_line = ["  " + "".join(decode(candidate))]
             tableau_line.extend(self.violation_table[candidate])
             string += format_string.format(*tableau_line)
             string += "\n"
@@ -3,88 +3,364 @@ Given a list of constraint rankings, run the typology.
 
 Either print out all the possibilities for inspection (warning: a lot!)
 or count the number of different typologies that arise.
+
+Rankings can be evaluated by three engines: "tableau" runs a Tableau for
+every input under every ranking, while "matrix" computes each violation
+once into a ViolationMatrix and evaluates a ranking by filtering its columns.
+"tree" also uses a ViolationMatrix, but evaluates the rankings as a prefix
+tree, stopping as soon as a prefix decides every input. It is the default.
+
+Alternatively, print_language_typology finds the distinct languages of a
+constraint set directly by Recursive Constraint Demotion (see rcd.py),
+together with the number of rankings producing each, without enumerating
+the rankings at all.
+
+Passing workers > 1 shards the rankings across a process pool. Output is
+printed in the same order as a serial run.
+
+For long runs, write_full_typology streams the full typology to a
+compressed file with checkpoints (see writer.py) and resumes after the
+last checkpoint if restarted.
+
+Inputs and candidates come from default_gen (stems of CCCVV with roots of
+3 segments) unless another Gen is passed in; print_split_typologies runs
+the count typology for every split of a stem into a root and residue.
 """
 
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import itertools
-from gen import Gen
+from gen import Gen, all_splits
 from constraints import ConstraintSet
-from tableau import Tableau
+from tableau import Tableau, winner_typology
+from violations import ViolationMatrix
+from ranking_tree import RankingTree
+from rcd import FactorialTypology
+from writer import TypologyWriter
 
-gen = Gen()
+default_gen = Gen()
 
+MATRIX_ENGINES = ("matrix", "tree")
 
-def print_full_typology(rankings):
-    """Print the full set of results: ranking, winner, and winner type."""
+# set in each worker process by _init_worker
+_worker_matrix = None
+_worker_gen = None
+_worker_num_inputs = None
+
+
+def build_violation_matrix(rankings, gen=None):
+    """Build a ViolationMatrix over every constraint used in rankings."""
+    constraints = list()
     for ranking in rankings:
-        constraint_ranking = ConstraintSet(ranking)
-        print("----------------------------------")
-        print(constraint_ranking)
-        print("----------------------------------")
-        for inputs in gen.inputs():
-            tableau = Tableau(inputs, constraint_ranking,
-                              gen.candidates(inputs))
-            print(inputs, tableau.winners, tableau.typology)
+        for constraint in ranking:
+            if constraint not in constraints:
+                constraints.append(constraint)
+    return ViolationMatrix(gen or default_gen, ConstraintSet(constraints))
+
+
+def _evaluate_matrix(rankings, engine, matrix, function):
+    """Apply function to the winner mask of each ranking, in order."""
+    if engine == "tree":
+        return RankingTree(rankings).evaluate(matrix, function)
+    return (function(matrix.winners(ranking)) for ranking in rankings)
+
+
+def evaluate_rankings(rankings, engine="tree", matrix=None, gen=None):
+    """
+    Find the winners for every input under each ranking.
+
+    Yield (constraint ranking, [(inputs, winners, winner type), ...]).
+    """
+    gen = gen or default_gen
+    if engine in MATRIX_ENGINES:
+        rankings = list(rankings)
+        if matrix is None:
+            matrix = build_violation_matrix(rankings, gen)
+        for ranking, winners in zip(rankings, _evaluate_matrix(
+                rankings, engine, matrix, matrix.winning_candidates)):
+            yield ConstraintSet(ranking), [
+                (inputs, input_winners,
+                 winner_typology(inputs, input_winners[0]))
+                for inputs, input_winners in zip(matrix.inputs, winners)]
+    elif engine == "tableau":
+        for ranking in rankings:
+            constraint_ranking = ConstraintSet(ranking)
+            results = list()
+            for inputs in gen.inputs():
+                tableau = Tableau(inputs, constraint_ranking,
+                                  gen.candidates(inputs))
+                results.append((inputs, tableau.winners, tableau.typology))
+            yield constraint_ranking, results
+    else:
+        raise ValueError(f"unknown engine: {engine}")
+
+
+def count_typologies(rankings, engine="tree", matrix=None, gen=None):
+    """Yield (constraint ranking, count of each winner type) per ranking."""
+    if engine in MATRIX_ENGINES:
+        rankings = list(rankings)
+        if matrix is None:
+            matrix = build_violation_matrix(rankings, gen)
+        for ranking, list_of_typologies in zip(rankings, _evaluate_matrix(
+                rankings, engine, matrix, matrix.typology_counts)):
+            yield ConstraintSet(ranking), list_of_typologies
+    else:
+        for constraint_ranking, results in evaluate_rankings(
+                rankings, engine, gen=gen):
+            yield constraint_ranking, Counter(typology for _, _, typology
+                                              in results)
+
+
+class TypologySummary:
+    """Tally the rankings with non-concatenative or unattested outputs."""
+
+    def __init__(self):
+        """Initialize all the counts to zero."""
+        self.count_at_least_1_nonconcat = 0
+        self.count_at_least_half_nonconcat = 0
+        self.count_at_least_1_unattested = 0
+        self.count_at_least_half_unattested = 0
+        self.total_count = 0
+
+    def add(self, list_of_typologies, num_rankings=1):
+        """Add the winner type counts of one (or num_rankings) rankings."""
+        num_inputs = sum(list_of_typologies.values())
+        nonconcat = (list_of_typologies['nonconcat_cv'] +
+                     list_of_typologies['unattested'])
+        unattested = list_of_typologies['unattested']
+
+        self.total_count += num_rankings
+        if nonconcat >= 1:
+            self.count_at_least_1_nonconcat += num_rankings
+        if 2 * nonconcat > num_inputs:
+            self.count_at_least_half_nonconcat += num_rankings
+        if unattested >= 1:
+            self.count_at_least_1_unattested += num_rankings
+        if 2 * unattested > num_inputs:
+            self.count_at_least_half_unattested += num_rankings
+
+    def merge(self, other):
+        """Add the counts of another summary to this one."""
+        self.count_at_least_1_nonconcat += other.count_at_least_1_nonconcat
+        self.count_at_least_half_nonconcat += (
+            other.count_at_least_half_nonconcat)
+        self.count_at_least_1_unattested += other.count_at_least_1_unattested
+        self.count_at_least_half_unattested += (
+            other.count_at_least_half_unattested)
+        self.total_count += other.total_count
+
+    def __str__(self):
+        """Describe the summary in words."""
+        return "\n".join([
+            f"{self.count_at_least_1_nonconcat}/{self.total_count} "
+            f"({_percentage(self.count_at_least_1_nonconcat, self.total_count)})"
+            f" rankings have at least one non-concatenative output.",
+            f"{self.count_at_least_half_nonconcat}/{self.total_count} "
+            f"({_percentage(self.count_at_least_half_nonconcat, self.total_count)})"
+            f" rankings have more than half non-concatenative outputs.",
+            f"{self.count_at_least_1_unattested}/"
+            f"{self.count_at_least_1_nonconcat} "
+            f"({_percentage(self.count_at_least_1_unattested, self.count_at_least_1_nonconcat)}) "
+            "non-concat rankings have at least one unattested output.",
+            f"{self.count_at_least_half_unattested}/"
+            f"{self.count_at_least_half_nonconcat} "
+            f"({_percentage(self.count_at_least_half_unattested, self.count_at_least_half_nonconcat)}) "
+            "majority non-concat rankings have more than half "
+            "unattested outputs.",
+        ])
+
+
+def _percentage(count, total):
+    """Format count as a percentage of total, which may be 0."""
+    return f"{100 * count / total:.1f}%" if total else "n/a"
+
+
+def format_full_typology(constraint_ranking, results):
+    """Return the lines printed for one ranking in the full typology."""
+    lines = ["----------------------------------",
+             str(constraint_ranking),
+             "----------------------------------"]
+    lines.extend(str(inputs) + " " + str(winners) + " " + typology
+                 for inputs, winners, typology in results)
+    return lines
+
 
+def format_count_typology(constraint_ranking, list_of_typologies):
+    """Return the line printed for one ranking (or language) of counts."""
+    return "\t".join([
+        str(constraint_ranking),
+        str(list_of_typologies['concat_suffix']),
+        str(list_of_typologies['concat_prefix']),
+        str(list_of_typologies['infix']),
+        str(list_of_typologies['nonconcat_cv']),
+        str(list_of_typologies['unattested']),
+    ])
 
-def print_count_typology(rankings):
+
+def format_winners(winners):
+    """
+    Return the winners of every input of a language on one line.
+
+    Each winner is written as its segments run together, ties joined by
+    '/', and the inputs are separated by spaces in the order of the Gen.
+    """
+    return " ".join("/".join("".join(candidate) for candidate in candidates)
+                    for candidates in winners)
+
+
+def _chunks(rankings, chunk_size):
+    """Split a stream of rankings into lists of at most chunk_size."""
+    rankings = iter(rankings)
+    while True:
+        chunk = list(itertools.islice(rankings, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(matrix, worker_gen):
+    """Keep the ViolationMatrix and Gen shared by every chunk in a worker."""
+    global _worker_matrix, _worker_gen, _worker_num_inputs
+    _worker_matrix = matrix
+    _worker_gen = worker_gen
+    _worker_num_inputs = (len(matrix.inputs) if matrix is not None
+                          else sum(1 for _ in worker_gen.inputs()))
+
+
+def _full_typology_chunk(rankings, engine):
+    """Compute the full typology lines for a chunk of rankings."""
+    lines = list()
+    for constraint_ranking, results in evaluate_rankings(
+            rankings, engine, _worker_matrix, _worker_gen):
+        lines.extend(format_full_typology(constraint_ranking, results))
+    return lines
+
+
+def _full_typology_records_chunk(rankings, engine):
+    """Compute the full typology results for a chunk of rankings."""
+    return [(constraint_ranking.constraint_strings, results)
+            for constraint_ranking, results in evaluate_rankings(
+                rankings, engine, _worker_matrix, _worker_gen)]
+
+
+def _count_typology_chunk(rankings, engine):
+    """Compute the count lines and summary for a chunk of rankings."""
+    lines = list()
+    summary = TypologySummary()
+    for constraint_ranking, list_of_typologies in count_typologies(
+            rankings, engine, _worker_matrix, _worker_gen):
+        assert(sum(list_of_typologies.values()) == _worker_num_inputs)
+        lines.append(format_count_typology(constraint_ranking,
+                                           list_of_typologies))
+        summary.add(list_of_typologies)
+    return lines, summary
+
+
+def _map_chunks(function, rankings, engine, workers, chunk_size, gen=None):
+    """
+    Apply function to successive chunks of rankings.
+
+    Results are yielded in the order of the chunks, whether they are
+    computed in this process or in a pool of worker processes.
+    """
+    gen = gen or default_gen
+    matrix = None
+    if engine in MATRIX_ENGINES:
+        rankings = list(rankings)
+        matrix = build_violation_matrix(rankings, gen)
+    else:
+        # the candidates are sent to the workers rather than regenerated
+        gen.precompute()
+
+    if workers == 1:
+        _init_worker(matrix, gen)
+        for chunk in _chunks(rankings, chunk_size):
+            yield function(chunk, engine)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(matrix, gen)) as executor:
+        yield from executor.map(function, _chunks(rankings, chunk_size),
+                                itertools.repeat(engine))
+
+
+def print_full_typology(rankings, engine="tree", workers=1,
+                        chunk_size=64, gen=None):
+    """Print the full set of results: ranking, winner, and winner type."""
+    for lines in _map_chunks(_full_typology_chunk, rankings, engine,
+                             workers, chunk_size, gen):
+        print("\n".join(lines))
+
+
+def write_full_typology(rankings, path, engine="tree", workers=1,
+                        chunk_size=64, block_size=1000, gen=None):
+    """
+    Write the full set of results to path, resuming if it was interrupted.
+
+    Rankings must come in the same order every time the run is restarted.
+    A checkpoint is made every block_size rankings.
+    """
+    with TypologyWriter(path, block_size) as writer:
+        rankings = itertools.islice(rankings, writer.completed, None)
+        for records in _map_chunks(_full_typology_records_chunk, rankings,
+                                   engine, workers, chunk_size, gen):
+            for ranking, results in records:
+                writer.write(ranking, results)
+
+
+def print_count_typology(rankings, engine="tree", workers=1,
+                         chunk_size=64, gen=None):
     """Print each ranking and morphology count over all possible inputs."""
     print("\t".join(["ranking", "suffix", "prefix", "infix",
                      "nonconcat_cv", "nonconcat_unattested"]))
 
-    count_at_least_1_nonconcat = 0
-    count_at_least_half_nonconcat = 0
-    count_at_least_1_unattested = 0
-    count_at_least_half_unattested = 0
-    total_count = 0
+    summary = TypologySummary()
+    for lines, chunk_summary in _map_chunks(_count_typology_chunk, rankings,
+                                            engine, workers, chunk_size,
+                                            gen):
+        print("\n".join(lines))
+        summary.merge(chunk_summary)
 
-    for ranking in rankings:
-        constraint_ranking = ConstraintSet(ranking)
-        total_count += 1
+    print("\nSummary:\n")
+    print(summary)
 
-        list_of_typologies = Counter()
-        for inputs in gen.inputs():
-            tableau = Tableau(inputs, constraint_ranking,
-                              gen.candidates(inputs))
-            list_of_typologies[tableau.typology] += 1
 
-        assert(sum(list_of_typologies.values()) == 10)
+def print_split_typologies(rankings, segments, engine="tree", workers=1,
+                           chunk_size=64):
+    """
+    Print the count typology for every split of segments into root+residue.
 
-        print("\t".join([
-            str(constraint_ranking),
-            str(list_of_typologies['concat_suffix']),
-            str(list_of_typologies['concat_prefix']),
-            str(list_of_typologies['infix']),
-            str(list_of_typologies['nonconcat_cv']),
-            str(list_of_typologies['unattested']),
-        ]))
+    E.g. with segments 'CCCVV', roots of 1, 2, 3 and 4 segments in turn.
+    """
+    rankings = list(rankings)
+    for gen in all_splits(segments):
+        print(f"{segments}: root length {gen.root_length}, "
+              f"residue length {gen.residue_length}")
+        print("-"*50)
+        print_count_typology(rankings, engine, workers, chunk_size, gen)
+        print("\n\n\n")
 
-        # get meta stats
-        if (list_of_typologies['nonconcat_cv'] +
-           list_of_typologies['unattested'] >= 1):
-            count_at_least_1_nonconcat += 1
 
-        if (list_of_typologies['nonconcat_cv'] +
-           list_of_typologies['unattested'] >= 6):
-            count_at_least_half_nonconcat += 1
+def print_language_typology(constraints, dominations=(), gen=None):
+    """
+    Print each distinct language of the constraints and its morphology count.
 
-        if (list_of_typologies['unattested'] >= 1):
-            count_at_least_1_unattested += 1
+    Every total ranking of constraints respecting dominations, a sequence of
+    (higher, lower) constraint pairs, is accounted for. Languages with the
+    same counts are told apart by their winners, in the last column.
+    """
+    print("\t".join(["rankings", "suffix", "prefix", "infix",
+                     "nonconcat_cv", "nonconcat_unattested", "winners"]))
 
-        if (list_of_typologies['unattested'] >= 6):
-            count_at_least_half_unattested += 1
+    matrix = build_violation_matrix([constraints], gen)
+    summary = TypologySummary()
+    for language in FactorialTypology(matrix, constraints,
+                                      dominations).languages():
+        list_of_typologies = matrix.typology_counts(language.viable)
+        print(format_count_typology(language.num_rankings,
+                                    list_of_typologies) + "\t" +
+              format_winners(language.winners))
+        summary.add(list_of_typologies, language.num_rankings)
 
     print("\nSummary:\n")
-    print(f"{count_at_least_1_nonconcat}/{total_count} "
-          f"({100 * count_at_least_1_nonconcat/total_count:.1f}%) rankings "
-          f"have at least one non-concatenative output.")
-    print(f"{count_at_least_half_nonconcat}/{total_count} "
-          f"({100 * count_at_least_half_nonconcat/total_count:.1f}%) rankings "
-          f"have more than half non-concatenative outputs.")
-    print(f"{count_at_least_1_unattested}/{count_at_least_1_nonconcat} "
-          f"({100 * count_at_least_1_unattested/count_at_least_1_nonconcat:.1f}%) "
-           "non-concat rankings have at least one unattested output.")
-    print(f"{count_at_least_half_unattested}/{count_at_least_half_nonconcat} "
-          f"({100 * count_at_least_half_unattested/count_at_least_half_nonconcat:.1f}%) "
-           "majority non-concat rankings have more than half "
-           "unattested outputs.")
+    print(summary)
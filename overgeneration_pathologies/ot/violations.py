@@ -0,0 +1,114 @@
+"""Precompute constraint violations for evaluating many rankings at once."""
+
+from collections import Counter
+import numpy as np
+from tableau import TYPOLOGIES, winner_typology
+from segments import encode
+
+
+class ViolationMatrix:
+    """
+    Violation counts of every candidate of every input on every constraint.
+
+    Each (input, candidate, constraint) violation count is computed once.
+    The candidates of all inputs are stacked into the rows of one integer
+    matrix, so a ranking is evaluated for every input simultaneously by
+    filtering the matrix one constraint column at a time.
+
+    Constraints with a batch version are evaluated on all the candidates
+    of an input in one call; the others one candidate at a time.
+    """
+
+    def __init__(self, gen, constraint_set):
+        """Evaluate every constraint in constraint_set on gen's candidates."""
+        self.constraint_strings = list(constraint_set.constraint_strings)
+        self.columns = {constraint: j for j, constraint
+                        in enumerate(self.constraint_strings)}
+        self.inputs = list(gen.inputs())
+        self.candidates = list()
+
+        input_index, blocks, typologies = list(), list(), list()
+        for i, inputs in enumerate(self.inputs):
+            candidates = gen.candidates(inputs)
+            self.candidates.extend(candidates)
+            input_index.extend([i] * len(candidates))
+            blocks.append(self._violations(constraint_set, inputs,
+                                           candidates, gen.encoded))
+            typologies.extend(
+                TYPOLOGIES.index(winner_typology(inputs, candidate))
+                for candidate in candidates)
+
+        self.violations = np.concatenate(blocks).astype(np.int64)
+        self.input_index = np.array(input_index, dtype=np.intp)
+        # row at which the candidates of each input start
+        self.offsets = np.searchsorted(self.input_index,
+                                       np.arange(len(self.inputs)))
+        self.typology_codes = np.array(typologies, dtype=np.intp)
+
+    def _violations(self, constraint_set, inputs, candidates, encoded):
+        """Return the violations of the candidates for one input."""
+        if encoded:
+            codes = np.array(candidates)
+            encoded_inputs = inputs
+        else:
+            codes = np.array([encode(candidate) for candidate in candidates])
+            encoded_inputs = tuple(encode(morpheme) for morpheme in inputs)
+
+        columns = list()
+        for constraint, batch_constraint in zip(
+                constraint_set.constraints, constraint_set.batch_constraints):
+            if batch_constraint is not None:
+                columns.append(batch_constraint(codes, encoded_inputs))
+            else:
+                columns.append([constraint(candidate, inputs)
+                                for candidate in candidates])
+        return np.array(columns, dtype=np.int64).reshape(
+            len(columns), len(candidates)).T
+
+    def filter(self, viable, constraint):
+        """
+        Apply one constraint to a mask of still-viable candidates.
+
+        Keep, for each input, only the viable candidates with the fewest
+        violations of constraint.
+        """
+        column = self.violations[:, self.columns[constraint]]
+        masked = np.where(viable, column, np.iinfo(column.dtype).max)
+        minima = np.minimum.reduceat(masked, self.offsets)
+        return viable & (masked == minima[self.input_index])
+
+    def winners(self, ranking):
+        """Return a boolean mask of the winning candidates under ranking."""
+        viable = np.ones(len(self.candidates), dtype=bool)
+        for constraint in ranking:
+            viable = self.filter(viable, constraint)
+        return viable
+
+    def is_decisive(self, viable):
+        """Return True if a single candidate is viable for every input."""
+        return bool((np.add.reduceat(viable, self.offsets) == 1).all())
+
+    def winning_candidates(self, viable):
+        """Return the list of winning candidates for each input in turn."""
+        winners = [list() for _ in self.inputs]
+        for row in np.flatnonzero(viable):
+            winners[self.input_index[row]].append(self.candidates[row])
+        return winners
+
+    def typology_counts(self, viable):
+        """Count how many inputs yield each type of winner."""
+        rows = np.flatnonzero(viable)
+        codes = self.typology_codes[rows]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = self.input_index[rows[1:]] != self.input_index[rows[:-1]]
+        # all the winners for an input must be of the same type
+        assert (codes == codes[first][np.cumsum(first) - 1]).all()
+
+        counts = np.bincount(codes[first], minlength=len(TYPOLOGIES))
+        return Counter({typology: int(count)
+                        for typology, count in zip(TYPOLOGIES, counts)
+                        if count})
+
+    def __len__(self):
+        """Define the length as the total number of candidates."""
+        return len(self.candidates)
@@ -0,0 +1,118 @@
+"""
+Write full typologies to disk as they are computed, so runs can resume.
+
+Results are stored as gzip-compressed JSON lines, one line per ranking.
+Rankings are buffered and written in blocks, each block a complete gzip
+member appended to the file. After every block the file is synced and a
+checkpoint alongside it records how many rankings and bytes are complete.
+When a run is restarted, anything after the checkpoint (e.g. half of a
+block being written during a crash) is cut off and the caller skips the
+rankings already done.
+"""
+
+import gzip
+import json
+import os
+
+
+def checkpoint_path(path):
+    """Return the path of the checkpoint kept alongside path."""
+    return path + ".checkpoint"
+
+
+class TypologyWriter:
+    """A resumable, block-buffered writer of full typology results."""
+
+    def __init__(self, path, block_size=1000):
+        """
+        Open path for writing, resuming from its checkpoint if there is one.
+
+        self.completed is the number of rankings already written, which
+        the caller should skip. A file at path without a checkpoint was
+        not written by a TypologyWriter, so it is not overwritten: this
+        raises FileExistsError instead. If the file is missing or shorter
+        than its checkpoint says, rankings have been lost, and this raises
+        ValueError.
+        """
+        self.path = path
+        self.block_size = block_size
+        self.completed = 0
+        self.size = 0
+        self._buffer = list()
+
+        if os.path.exists(checkpoint_path(path)):
+            with open(checkpoint_path(path)) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            self.completed = checkpoint["rankings"]
+            self.size = checkpoint["size"]
+            if not (os.path.exists(path) and
+                    os.path.getsize(path) >= self.size):
+                raise ValueError(f"{path} is missing or shorter than its "
+                                 "checkpoint")
+            self._file = open(path, "ab")
+            # drop whatever was written after the last checkpoint
+            self._file.truncate(self.size)
+        else:
+            self._file = open(path, "xb")
+            # checkpoint the empty file, so a crash during the first block
+            # can still be resumed
+            self._write_checkpoint()
+
+    def write(self, ranking, results):
+        """
+        Buffer the results of one ranking.
+
+        ranking is a sequence of constraint names and results a sequence of
+        (inputs, winners, winner type) as yielded by evaluate_rankings.
+        """
+        self._buffer.append(json.dumps({
+            "ranking": list(ranking),
+            "results": [{"input": inputs, "winners": winners,
+                         "typology": typology}
+                        for inputs, winners, typology in results],
+        }))
+        if len(self._buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rankings as a block and move the checkpoint."""
+        if not self._buffer:
+            return
+        block = gzip.compress(("\n".join(self._buffer) + "\n").encode())
+        self._file.write(block)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self.completed += len(self._buffer)
+        self.size += len(block)
+        self._buffer = list()
+
+        self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        """Record the rankings and bytes completed so far."""
+        temporary_path = checkpoint_path(self.path) + ".tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump({"rankings": self.completed, "size": self.size},
+                      checkpoint_file)
+        os.replace(temporary_path, checkpoint_path(self.path))
+
+    def close(self):
+        """Write any buffered rankings and close the file."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        """Use the writer as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the writer, keeping whatever was completed."""
+        self.close()
+
+
+def read_typology(path):
+    """Generate the records of a typology written by TypologyWriter."""
+    with gzip.open(path, "rt") as typology_file:
+        for line in typology_file:
+            yield json.loads(line)
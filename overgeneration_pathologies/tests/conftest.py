@@ -0,0 +1,8 @@
+"""Let the ot/ and my_model/ modules import one another as scripts do."""
+
+import os
+import sys
+
+for directory in ['ot', 'my_model']:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir,
+                                    directory))
@@ -0,0 +1,64 @@
+"""Test my_model/chains.py."""
+
+import numpy as np
+from my_model.chains import (STATISTICS, Chains, effective_sample_size,
+                             split_r_hat)
+from my_model.corpus import load_corpus
+
+
+def autoregressive(phi, shape, rng):
+    """Return chains of an AR(1) process with coefficient phi."""
+    noise = rng.normal(size=shape)
+    draws = np.zeros(shape)
+    for t in range(1, shape[1]):
+        draws[:, t] = phi * draws[:, t - 1] + noise[:, t]
+    return draws
+
+
+def test_split_r_hat():
+    """Test R-hat near 1 for mixed chains and above 1 for stuck ones."""
+    rng = np.random.default_rng(0)
+    draws = rng.normal(size=(4, 1000))
+    assert split_r_hat(draws) < 1.01
+    assert split_r_hat(draws + np.arange(4)[:, None]) > 1.1
+    # a trend within each chain shows up between its halves
+    assert split_r_hat(draws + np.linspace(0, 3, 1000)) > 1.1
+
+
+def test_effective_sample_size():
+    """Test the ESS of independent and autocorrelated draws."""
+    rng = np.random.default_rng(1)
+    assert abs(effective_sample_size(rng.normal(size=(4, 1000))) /
+               4000 - 1) < 0.1
+    # an AR(1) process has ESS n (1 - phi) / (1 + phi)
+    ess = effective_sample_size(autoregressive(0.9, (4, 2000), rng))
+    assert abs(ess / (8000 * 0.1 / 1.9) - 1) < 0.25
+
+
+def test_chains():
+    """Test that chains are the same whether run in processes or not."""
+    forms = [form.decode("ascii") for form in load_corpus("quran").forms]
+    serial = Chains(forms[:60], num_chains=3, seed=5, workers=1)
+    parallel = Chains(forms[:60], num_chains=3, seed=5, workers=2)
+    assert len(parallel.processes) == 2
+    rounds = list(serial.run(max_sweeps=12, sweeps_per_round=4,
+                             max_r_hat=1, min_ess=10 ** 6))
+    assert list(parallel.run(max_sweeps=12, sweeps_per_round=4,
+                             max_r_hat=1, min_ess=10 ** 6)) == rounds
+    assert [sweeps for sweeps, _ in rounds] == [8, 12]
+    assert set(rounds[-1][1]) == set(STATISTICS)
+    assert serial.traces == parallel.traces
+
+    samplers = parallel.close()
+    assert [sampler.segmentations for sampler in samplers] == [
+        sampler.segmentations for sampler in serial.close()]
+    assert samplers[0].segmentations != samplers[1].segmentations
+
+
+def test_chains_stop():
+    """Test that chains stop once the diagnostics pass."""
+    forms = [form.decode("ascii") for form in load_corpus("english").forms]
+    chains = Chains(forms[:30], num_chains=2, seed=6)
+    rounds = list(chains.run(max_sweeps=100, sweeps_per_round=4,
+                             max_r_hat=np.inf, min_ess=0))
+    assert len(rounds) == 1 and chains.num_sweeps == 8
@@ -0,0 +1,63 @@
+"""Test my_model/classify.py."""
+
+import numpy as np
+from my_model.classify import (CATEGORIES, CONSONANT, VOWEL, VOWELS,
+                               classify, count_runs, popcount,
+                               segment_classes, typology_counts)
+from my_model.corpus import load_corpus
+
+
+def test_popcount():
+    """Test the popcount against counting the bits of random integers."""
+    values = np.random.default_rng(0).integers(0, 2 ** 63, 1000,
+                                               dtype=np.uint64)
+    values[:2] = [0, 2 ** 64 - 1]
+    assert (popcount(values) ==
+            [bin(int(value)).count("1") for value in values]).all()
+
+
+def test_count_runs():
+    """Test run counts of masks, with bit i for segment i."""
+    templates = ["1", "10", "110", "101", "0101", "1" * 63, "01" * 31]
+    masks = np.array([int(t[::-1], 2) for t in templates], dtype=np.uint64)
+    lengths = np.array([len(t) for t in templates], dtype=np.uint8)
+    assert list(count_runs(masks, lengths)) == [1, 2, 2, 3, 4, 1, 62]
+
+
+def test_segment_classes():
+    """Test classifying strings as all consonants or all vowels."""
+    strings = np.array([b"ktb", b"a~a", b"ta", b"", b"o"])
+    assert list(segment_classes(strings, "quran")) == [
+        CONSONANT, VOWEL, 0, 0, 0]
+
+
+def test_english_vowels():
+    """Test the DISC vowels against the segments of the English verbs."""
+    assert len(set(VOWELS["english"])) == len(VOWELS["english"])
+    segments = set(b"".join(load_corpus("english").forms).decode())
+    assert segments & set(VOWELS["english"]) == set("IE{VQU@i#$u312345678")
+    # syllabic consonants and affricates are consonants
+    assert not set("HPJ_") & set(VOWELS["english"])
+
+
+def test_classify():
+    """Test the categories against templates classified by hand."""
+    templates = ["1100", "0110", "10101", "10101", "10110", "111"]
+    masks = np.array([int(t[::-1], 2) for t in templates], dtype=np.uint64)
+    lengths = np.array([len(t) for t in templates], dtype=np.uint8)
+    roots = np.array([CONSONANT, VOWEL, CONSONANT, VOWEL, 0, 0])
+    residues = np.array([VOWEL, CONSONANT, VOWEL, VOWEL, VOWEL, 0])
+    assert [CATEGORIES[code] for code in classify(
+        masks, lengths, roots, residues)] == [
+        "concat", "infix", "nonconcat_cv", "unattested", "unattested",
+        "degenerate"]
+
+
+def test_corpora():
+    """Test that Arabic is non-concatenative and English mostly not."""
+    quran = typology_counts(load_corpus("quran"))
+    assert sum(quran.values()) == 1563
+    assert quran["nonconcat_cv"] > quran["unattested"] > 0
+    english = typology_counts(load_corpus("english"))
+    assert english["concat"] > sum(english.values()) / 2
+    assert "degenerate" not in english
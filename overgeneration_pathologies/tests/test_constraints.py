@@ -1,7 +1,10 @@
 """Test constraints.py."""
 
+import numpy as np
 import pytest
 from ot.constraints import ConstraintSet
+from ot.gen import Gen
+from ot.segments import encode
 
 
 @pytest.fixture
@@ -107,3 +110,39 @@ def test_contiguity(constraint_set):
                                      inputs) == 0
     assert constraint_set.contiguity(('C1', 'C3', 'V1', 'V2', 'C2'),
                                      inputs) == 3
+
+
+ALL_CONSTRAINTS = ['contiguity', 'c_adj_v',
+                   'align_left_root', 'align_left_residue',
+                   'align_right_root', 'align_right_residue',
+                   'anchor_left_root', 'anchor_left_residue',
+                   'anchor_right_root', 'anchor_right_residue']
+
+
+def test_encoded_constraints():
+    """Test that encoded candidates get the same violations as strings."""
+    constraint_set = ConstraintSet(ALL_CONSTRAINTS)
+    encoded_set = ConstraintSet(ALL_CONSTRAINTS, encoded=True)
+    gen = Gen()
+    for inputs in gen.inputs():
+        encoded_inputs = tuple(encode(morpheme) for morpheme in inputs)
+        for candidate in gen.candidates(inputs):
+            for constraint, encoded in zip(constraint_set, encoded_set):
+                assert (constraint(candidate, inputs) ==
+                        encoded(encode(candidate), encoded_inputs))
+
+
+@pytest.mark.parametrize("segments,root_length", [
+    ('CCCVV', 3), ('CCVVV', 2), ('CCCCVVVV', 4), ('CVCVCV', 1)])
+def test_batch_constraints(segments, root_length):
+    """Test that the batch constraints agree with the scalar ones."""
+    constraint_set = ConstraintSet(ALL_CONSTRAINTS, encoded=True)
+    gen = Gen(segments=segments, root_length=root_length, encoded=True)
+    for inputs in gen.inputs():
+        candidates = gen.candidates(inputs)
+        array = np.array(candidates)
+        for constraint, batch_constraint in zip(
+                constraint_set, constraint_set.batch_constraints):
+            assert (list(batch_constraint(array, inputs)) ==
+                    [constraint(candidate, inputs)
+                     for candidate in candidates])
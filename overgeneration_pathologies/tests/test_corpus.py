@@ -0,0 +1,52 @@
+"""Test my_model/corpus.py."""
+
+import os
+import numpy as np
+from my_model.corpus import Index, load_corpus
+
+
+def test_quran():
+    """Test reading the Arabic verbs."""
+    corpus = load_corpus("quran")
+    assert len(corpus) == 1563
+    assert corpus.verbs[2] == corpus.forms[2] == b"ba$~ar"
+    assert corpus.template(2) == "101001"
+    assert corpus.roots[2] == b"b$r" and corpus.residues[2] == b"a~a"
+    assert 2 in corpus.by_root.lookup(b"b$r")
+    assert 2 in corpus.rows_with_template("101001")
+    assert corpus.by_template.counts().sum() == len(corpus)
+
+
+def test_english():
+    """Test reading the English verbs, whose masks cover DISC."""
+    corpus = load_corpus("english")
+    assert len(corpus) == 1549
+    assert corpus.verbs[2] == b"done" and corpus.forms[2] == b"dVn"
+    assert corpus.template(2) == "100"
+    # a verb with an empty residue
+    row = corpus.by_root.lookup(b"lUk")[0]
+    assert corpus.residues[row] == b"" and corpus.template(row) == "111"
+    # 011 and 0011 are different templates
+    assert not set(corpus.rows_with_template("011")) & set(
+        corpus.rows_with_template("0011"))
+
+
+def test_index():
+    """Test looking up rows by value."""
+    index = Index.build(np.array([b"b", b"a", b"b", b"c"]))
+    assert list(index.lookup(b"b")) == [0, 2]
+    assert list(index.lookup(b"z")) == []
+    assert list(index.counts()) == [1, 2, 1]
+
+
+def test_cache(tmp_path):
+    """Test that the saved copy is memory mapped and identical."""
+    parsed = load_corpus("quran")
+    load_corpus("quran", cache_dir=str(tmp_path))
+    assert os.path.isdir(tmp_path / "quran")
+    mapped = load_corpus("quran", cache_dir=str(tmp_path))
+    assert isinstance(mapped.masks, np.memmap)
+    for column in mapped.COLUMNS:
+        assert (getattr(mapped, column) == getattr(parsed, column)).all()
+    assert (mapped.rows_with_template("101001") ==
+            parsed.rows_with_template("101001")).all()
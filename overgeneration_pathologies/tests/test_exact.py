@@ -0,0 +1,48 @@
+"""Test my_model/exact.py."""
+
+import numpy as np
+from my_model.exact import (nonconcat_distribution, nonconcat_probabilities,
+                            template_class_probabilities)
+
+
+def test_template_class_probabilities():
+    """Test the template classes against enumerating short templates."""
+    # templates of length 1 to 3: P(length) for lambda_ = 1
+    lengths = np.array([1, 1 / 2, 1 / 6]) / (np.e - 1)
+    degenerate = lengths @ [1, 1 / 2, 1 / 4]
+    probabilities = template_class_probabilities(lambda_=1)
+    assert abs(probabilities[0] - degenerate) < 0.01
+    assert abs(probabilities.sum() - 1) < 1e-12
+    # the shortest non-concatenative templates are rsrs and srsr
+    length_4 = 0.01 ** 4 / 24 * np.exp(-0.01) / (1 - np.exp(-0.01))
+    assert (abs(template_class_probabilities(lambda_=0.01)[2] / length_4 -
+                1 / 8) < 0.001)
+
+
+def test_dirichlet_process():
+    """Test two words against a closed form for alpha = 0."""
+    beta, lambda_ = 5, 5
+    degenerate, _, nonconcat = template_class_probabilities(lambda_)
+    # leaving out degenerate tables leaves a Dirichlet process again
+    concentration = beta * (1 - degenerate)
+    q = nonconcat / (1 - degenerate)
+    distribution = nonconcat_distribution(2, 2000, alpha=0, beta=beta,
+                                          lambda_=lambda_)
+    assert abs(distribution[2] -
+               q * (1 + concentration * q) / (1 + concentration)) < 1e-6
+    assert abs(distribution.sum() - 1) < 1e-6
+
+
+def test_nonconcat_probabilities():
+    """Test that the bounds are consistent and narrower than tolerance."""
+    (one_low, one_high), (half_low, half_high) = nonconcat_probabilities(
+        10, tolerance=1e-8)
+    assert 0 <= half_low <= one_low <= 1
+    assert one_high - one_low < 1e-8 and half_high - half_low < 1e-8
+
+
+def test_one_word():
+    """Test that a single non-concatenative word passes the first threshold."""
+    degenerate, _, nonconcat = template_class_probabilities()
+    (low, high), _ = nonconcat_probabilities(1, tolerance=1e-10)
+    assert abs(low - nonconcat / (1 - degenerate)) < 1e-8
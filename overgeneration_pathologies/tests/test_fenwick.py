@@ -0,0 +1,49 @@
+"""Test my_model/fenwick.py."""
+
+import random
+from my_model.fenwick import FenwickTree
+
+
+def test_prefix_sums():
+    """Test prefix sums while appending and updating weights."""
+    weights = list()
+    tree = FenwickTree()
+    rng = random.Random(0)
+    for _ in range(100):
+        weights.append(rng.randint(0, 5))
+        tree.append(weights[-1])
+        index = rng.randrange(len(weights))
+        weights[index] += 1
+        tree.add(index, 1)
+        assert len(tree) == len(weights)
+        for n in range(len(weights) + 1):
+            assert tree.prefix_sum(n) == sum(weights[:n])
+
+
+def test_find():
+    """Test finding the item at which the running total passes a target."""
+    tree = FenwickTree()
+    for weight in [2, 0, 3, 1]:
+        tree.append(weight)
+    assert ([tree.find(target) for target in [0, 1.5, 2, 4.9, 5, 5.5, 6]] ==
+            [0, 0, 2, 2, 3, 3, 4])
+    tree.clear()
+    assert len(tree) == 0 and tree.find(0) == 0
+    tree.append(4)
+    assert tree.prefix_sum(1) == 4
+
+
+def test_pop():
+    """Test removing the last weights."""
+    weights = [3, 1, 4, 1, 5, 9, 2, 6]
+    tree = FenwickTree()
+    for weight in weights:
+        tree.append(weight)
+    while weights:
+        weights.pop()
+        tree.pop()
+        assert len(tree) == len(weights)
+        for n in range(len(weights) + 1):
+            assert tree.prefix_sum(n) == sum(weights[:n])
+    tree.append(7)
+    assert tree.prefix_sum(1) == 7
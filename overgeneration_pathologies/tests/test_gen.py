@@ -1,7 +1,10 @@
 """Test gen.py."""
 
+import itertools
+import pickle
 import pytest
-from ot.gen import Gen
+from ot.gen import Gen, all_splits, multiset_permutations
+from ot.segments import decode
 
 
 @pytest.fixture
@@ -29,3 +32,62 @@ def test_candidate_absence(gen):
     candidates = gen.candidates((('C1', 'V2', 'C3'), ('C4', 'V5')))
     assert ('C1', 'V2', 'C3', 'V5', 'C4') not in candidates
     assert ('V2', 'C1', 'C4', 'C3', 'V5') not in candidates
+
+
+def test_multiset_permutations():
+    """Test that permutations are distinct and in lexicographic order."""
+    for items in ['CCCVV', 'CVCVCV', 'AABBBC', 'A', '']:
+        assert (list(multiset_permutations(items)) ==
+                sorted(set(itertools.permutations(items))))
+
+
+def test_longer_stems():
+    """Test input and candidate counts for a longer stem."""
+    gen = Gen(segments='CCCCVVVV', root_length=4)
+    inputs = list(gen.inputs())
+    assert len(inputs) == len(set(inputs)) == 70
+    assert (('C1', 'C2', 'C3', 'C4'), ('V5', 'V6', 'V7', 'V8')) in inputs
+    candidates = gen.candidates(inputs[0])
+    assert len(candidates) == len(set(candidates)) == 70
+
+
+def test_all_splits():
+    """Test that every root length between 1 and len - 1 is generated."""
+    gens = all_splits('CCCVV')
+    assert [gen.root_length for gen in gens] == [1, 2, 3, 4]
+    assert [gen.residue_length for gen in gens] == [4, 3, 2, 1]
+    with pytest.raises(AssertionError):
+        Gen(root_length=0)
+
+
+def test_candidate_cache():
+    """Test that candidates are cached, up to the cache size."""
+    gen = Gen(segments='CCCVV', root_length=3, cache_size=3)
+    inputs = list(gen.inputs())
+    first = gen.candidates(inputs[0])
+    assert gen.candidates(inputs[0]) is first
+    for other_inputs in inputs[1:]:
+        gen.candidates(other_inputs)
+    assert len(gen._candidate_cache) == 3
+    assert gen.candidates(inputs[0]) is not first
+    assert gen.candidates(inputs[0]) == first
+
+
+def test_precompute():
+    """Test that precomputed candidates travel with a pickled Gen."""
+    gen = Gen().precompute()
+    copy = pickle.loads(pickle.dumps(gen))
+    assert len(copy._candidate_cache) == 10
+    for inputs in gen.inputs():
+        assert copy._candidate_cache[inputs] == gen.candidates(inputs)
+
+
+def test_encoded():
+    """Test that an encoded Gen decodes to the same inputs and candidates."""
+    gen = Gen()
+    encoded_gen = Gen(encoded=True)
+    for inputs, encoded_inputs in zip(gen.inputs(), encoded_gen.inputs()):
+        assert inputs == tuple(decode(morpheme) for morpheme in encoded_inputs)
+        assert gen.candidates(inputs) == tuple(
+            decode(candidate)
+            for candidate in encoded_gen.candidates(encoded_inputs))
@@ -0,0 +1,158 @@
+"""Test my_model/gibbs.py and the restaurant updates it relies on."""
+
+import math
+import numpy as np
+import pytest
+from my_model.corpus import load_corpus
+from my_model.gibbs import GibbsSampler, gold_templates
+from my_model.simulation import RandomStream, RootRestaurant
+
+
+def check_restaurant(restaurant):
+    """Check that a restaurant's running counts match its tables."""
+    occupied = [i for i, count in enumerate(restaurant.counts) if count]
+    assert restaurant.num_tables == len(occupied)
+    assert restaurant.num_customers == sum(restaurant.counts)
+    assert sorted(occupied + restaurant.free_tables) == list(
+        range(len(restaurant.counts)))
+    for code, tables in enumerate(restaurant.dish_tables):
+        assert all(restaurant.dish_codes[i] == code for i in tables)
+        assert restaurant.dish_customers[code] == sum(
+            restaurant.counts[i] for i in tables)
+        if restaurant._by_dish:
+            counts = restaurant.dish_counts[code]
+            assert len(counts) == len(tables)
+            for slot, index in enumerate(tables):
+                assert restaurant.table_slots[index] == slot
+                assert (counts.prefix_sum(slot + 1) - counts.prefix_sum(slot)
+                        == restaurant.counts[index])
+            assert math.isclose(
+                restaurant.dish_weights[code].prefix_sum(len(tables)),
+                restaurant.dish_customers[code] -
+                restaurant.alpha * len(tables), abs_tol=1e-9)
+    assert math.isclose(
+        restaurant.weights.prefix_sum(len(restaurant.weights)),
+        restaurant.num_customers - restaurant.alpha * restaurant.num_tables,
+        abs_tol=1e-9)
+
+
+def test_add_and_remove_customers():
+    """Test seating and removing customers in a random order."""
+    random_stream = RandomStream(np.random.default_rng(0))
+    restaurant = RootRestaurant(2)
+    dishes = [a + b for a in "abc" for b in "abc"]
+    seated = list()
+    for step in range(2000):
+        if seated and random_stream.random() < 0.5:
+            dish = seated.pop(int(random_stream.random() * len(seated)))
+            restaurant.remove_customer(dish, random_stream)
+        else:
+            dish = dishes[int(random_stream.random() * len(dishes))]
+            restaurant.add_customer(dish, 1 / len(dishes), random_stream)
+            seated.append(dish)
+        check_restaurant(restaurant)
+
+    for dish in seated:
+        restaurant.remove_customer(dish, random_stream)
+    check_restaurant(restaurant)
+    assert restaurant.num_tables == 0 and not restaurant.tables
+
+
+def test_predictive():
+    """Test that the predictive probabilities over all dishes sum to 1."""
+    random_stream = RandomStream(np.random.default_rng(1))
+    restaurant = RootRestaurant(1)
+    for dish in "aaabbc":
+        restaurant.add_customer(dish, 1 / 4, random_stream)
+    assert math.isclose(
+        sum(restaurant.predictive(dish, 1 / 4) for dish in "abcd"), 1)
+
+
+def test_add_after_seat():
+    """Test adding and removing customers after forward seating."""
+    random_stream = RandomStream(np.random.default_rng(2))
+    restaurant = RootRestaurant(3)
+    codes = [restaurant.seat(random_stream) for _ in range(200)]
+    check_restaurant(restaurant)
+    for code in codes[:100]:
+        restaurant.remove_customer(restaurant.dishes[code], random_stream)
+        restaurant.add_customer(restaurant.dishes[code], 1 / 8,
+                                random_stream)
+        check_restaurant(restaurant)
+    assert restaurant.num_customers == 200
+
+
+def test_log_probability():
+    """Test the log probability of seatings worked out by hand."""
+    random_stream = RandomStream(np.random.default_rng())
+    restaurant = RootRestaurant(1, alpha=0.5, beta=2)
+    restaurant.add_customer("a", 1 / 4, random_stream)
+    assert math.isclose(restaurant.log_probability(lambda dish: 1 / 4),
+                        math.log(1 / 4))
+    # with a base probability of 0, a second "a" must join the first
+    restaurant.add_customer("a", 0, random_stream)
+    restaurant.add_customer("b", 1 / 4, random_stream)
+    expected = (1 / 4) * (0.5 / 3) * ((2 + 0.5) / 4) * (1 / 4)
+    assert math.isclose(restaurant.log_probability(lambda dish: 1 / 4),
+                        math.log(expected))
+    restaurant.remove_customer("b", random_stream)
+    assert math.isclose(restaurant.log_probability(lambda dish: 1 / 4),
+                        math.log((1 / 4) * (0.5 / 3)))
+
+
+def test_sampler_counts():
+    """Test that every verb is seated once in each kind of restaurant."""
+    forms = [form.decode("ascii") for form in load_corpus("quran").forms]
+    sampler = GibbsSampler(forms[:200], np.random.default_rng(0))
+    list(sampler.run(3))
+    assert sampler.template_restaurant.num_customers == 200
+    for restaurants in (sampler.root_restaurants, sampler.residue_restaurants):
+        assert sum(restaurant.num_customers
+                   for restaurant in restaurants.values()) == 200
+        for restaurant in restaurants.values():
+            check_restaurant(restaurant)
+    check_restaurant(sampler.template_restaurant)
+    assert 0 not in sampler.root_restaurants
+    assert 0 not in sampler.residue_restaurants
+    for form, (template, root, residue) in zip(forms, sampler.segmentations):
+        assert len(template) == len(form)
+        assert root and residue
+        assert root == "".join(segment for segment, part in
+                               zip(form, template) if part == "r")
+        assert residue == "".join(segment for segment, part in
+                                  zip(form, template) if part == "s")
+
+
+def test_short_verbs():
+    """Test that verbs of one segment are refused."""
+    with pytest.raises(ValueError):
+        GibbsSampler(["ab", "c"])
+
+
+def test_checkpoint(tmp_path):
+    """Test that resuming from a checkpoint continues the same chain."""
+    corpus = load_corpus("english")
+    forms = [form.decode("ascii") for form in corpus.forms][:100]
+    straight = GibbsSampler(forms, np.random.default_rng(2))
+    likelihoods = list(straight.run(4))
+
+    path = str(tmp_path / "checkpoint")
+    first = GibbsSampler(forms, np.random.default_rng(2))
+    assert list(first.run(2, path, checkpoint_every=2)) == likelihoods[:2]
+    resumed = GibbsSampler(forms, np.random.default_rng(99))
+    assert list(resumed.run(4, path)) == likelihoods[2:]
+    assert resumed.segmentations == straight.segmentations
+    assert 0 <= resumed.agreement(gold_templates(corpus)[:100]) <= 1
+
+    with pytest.raises(ValueError):
+        GibbsSampler(forms[:50]).load_checkpoint(path)
+
+
+def test_agreement():
+    """Test that verbs longer or shorter than their templates are left out."""
+    corpus = load_corpus("english")
+    gold = gold_templates(corpus)
+    sampler = GibbsSampler([form.decode("ascii") for form in corpus.forms])
+    assert len(gold) - len(sampler.comparable(gold)) == 6
+    sampler.segmentations = [(template, None, None) for template in gold]
+    assert sampler.agreement(gold) == 1
@@ -0,0 +1,44 @@
+"""Test ranking_tree.py."""
+
+import itertools
+import pytest
+from ot.ranking_tree import RankingTree
+from ot.violations import ViolationMatrix
+from ot.constraints import ConstraintSet, LIST_OF_CONSTRAINTS
+from ot.gen import Gen
+
+
+@pytest.fixture
+def matrix():
+    """Set up a ViolationMatrix over the default constraints as a fixture."""
+    yield ViolationMatrix(Gen(), ConstraintSet())
+
+
+def test_tree_matches_each_ranking(matrix):
+    """Test that every ranking gets the winners it has on its own."""
+    rankings = list(itertools.permutations(LIST_OF_CONSTRAINTS))
+    tree = RankingTree(rankings)
+    results = tree.evaluate(matrix, matrix.winning_candidates)
+    for ranking, winners in zip(rankings, results):
+        assert winners == matrix.winning_candidates(matrix.winners(ranking))
+
+
+def test_tree_prunes_decided_prefixes(matrix):
+    """Test that decided prefixes are evaluated once for their subtree."""
+    rankings = list(itertools.permutations(LIST_OF_CONSTRAINTS))
+    tree = RankingTree(rankings)
+    tree.evaluate(matrix, matrix.typology_counts)
+    assert tree.num_evaluations < len(rankings)
+    assert tree.num_filters < len(rankings) * len(LIST_OF_CONSTRAINTS)
+
+
+def test_tree_rankings_of_different_lengths(matrix):
+    """Test rankings where one is a prefix of another."""
+    rankings = [("align_left_root",),
+                ("align_left_root", "align_right_residue"),
+                ("align_left_root", "align_right_residue", "c_adj_v"),
+                ("c_adj_v",)]
+    results = RankingTree(rankings).evaluate(matrix,
+                                             matrix.winning_candidates)
+    for ranking, winners in zip(rankings, results):
+        assert winners == matrix.winning_candidates(matrix.winners(ranking))
@@ -0,0 +1,56 @@
+"""Test rcd.py."""
+
+from collections import Counter
+import itertools
+import pytest
+from ot.rcd import FactorialTypology, count_rankings, is_consistent
+from ot.violations import ViolationMatrix
+from ot.constraints import ConstraintSet, LIST_OF_CONSTRAINTS
+from ot.gen import Gen
+
+
+@pytest.fixture
+def matrix():
+    """Set up a ViolationMatrix over the default constraints as a fixture."""
+    yield ViolationMatrix(Gen(), ConstraintSet())
+
+
+def test_is_consistent():
+    """Test RCD on small sets of ERCs over three constraints."""
+    assert is_consistent([], 3)
+    assert is_consistent([(0b001, 0b010), (0b010, 0b100)], 3)
+    assert not is_consistent([(0b001, 0b010), (0b010, 0b001)], 3)
+    assert not is_consistent([(0b000, 0b100)], 3)
+
+
+def test_count_rankings():
+    """Test counting the rankings that satisfy a set of ERCs."""
+    assert count_rankings([], 4) == 24
+    assert count_rankings([(0b0001, 0b0010)], 4) == 12
+    assert count_rankings([(0b0001, 0b0010), (0b0010, 0b0100)], 4) == 4
+    assert count_rankings([(0b0001, 0b0010), (0b0010, 0b0001)], 4) == 0
+    # either the first or the second constraint must dominate the third
+    assert count_rankings([(0b0011, 0b0100)], 3) == 4
+
+
+def test_languages_match_rankings(matrix):
+    """Test that the languages are exactly those of the 720 rankings."""
+    by_ranking = Counter()
+    for ranking in itertools.permutations(LIST_OF_CONSTRAINTS):
+        by_ranking[tuple(matrix.winners(ranking))] += 1
+
+    languages = FactorialTypology(matrix).languages()
+    assert sum(language.num_rankings for language in languages) == 720
+    assert by_ranking == Counter({tuple(language.viable):
+                                  language.num_rankings
+                                  for language in languages})
+
+
+def test_dominations(matrix):
+    """Test restricting the rankings with a fixed domination."""
+    constraints = ['contiguity', 'c_adj_v', 'align_left_residue',
+                   'align_left_root', 'align_right_root']
+    languages = FactorialTypology(
+        matrix, constraints,
+        [('align_left_residue', 'align_left_root')]).languages()
+    assert sum(language.num_rankings for language in languages) == 60
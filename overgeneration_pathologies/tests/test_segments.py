@@ -0,0 +1,22 @@
+"""Test segments.py."""
+
+from ot.segments import (encode_segment, decode_segment, encode, decode,
+                         is_consonant)
+
+
+def test_round_trip():
+    """Test that segments decode to the names they were encoded from."""
+    for segment in ['C1', 'V2', 'C10', 'V12']:
+        assert decode_segment(encode_segment(segment)) == segment
+    candidate = ('C1', 'V4', 'C2', 'V5', 'C3')
+    assert decode(encode(candidate)) == candidate
+    assert decode(candidate) == candidate
+
+
+def test_codes():
+    """Test that codes are small ints that distinguish C's from V's."""
+    assert encode(('C1', 'V1', 'V4')) == (3, 2, 8)
+    assert is_consonant(encode_segment('C3'))
+    assert not is_consonant(encode_segment('V3'))
+    assert is_consonant('C3')
+    assert not is_consonant('V3')
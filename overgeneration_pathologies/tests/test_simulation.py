@@ -0,0 +1,123 @@
+"""Test my_model/simulation.py."""
+
+from collections import Counter
+import io
+import numpy as np
+import pytest
+from my_model.count_simulations import (clopper_pearson_interval,
+                                         count_simulations,
+                                         count_until_converged,
+                                         wilson_interval)
+from my_model.lexicon import read_lexicon, write_lexicon
+from my_model.simulation import (RandomStream, RootRestaurant, Simulation,
+                                 TemplateRestaurant, segment_class)
+
+
+def test_random_stream_lengths():
+    """Test that string lengths are positive with a Poisson-like mean."""
+    random_stream = RandomStream(np.random.default_rng(0), block_size=64)
+    lengths = [random_stream.string_length(5) for _ in range(5000)]
+    assert min(lengths) > 0
+    # mean of a zero-truncated Poisson(5)
+    assert abs(np.mean(lengths) - 5 / (1 - np.exp(-5))) < 0.1
+
+
+def test_random_stream_small_blocks():
+    """Test that blocks smaller than 16 still draw string lengths."""
+    random_stream = RandomStream(np.random.default_rng(0), block_size=8)
+    lengths = [random_stream.string_length(1.5) for _ in range(100)]
+    assert min(lengths) > 0
+
+
+def test_random_stream_reproducible():
+    """Test that the same seed gives the same numbers across blocks."""
+    first = RandomStream(np.random.default_rng(1), block_size=16)
+    second = RandomStream(np.random.default_rng(1), block_size=16)
+    assert ([first.string(10, "V", "C") for _ in range(20)] ==
+            [second.string(10, "V", "C") for _ in range(20)])
+    assert 0 <= first.random() < 1
+
+
+def test_count_simulations_reproducible():
+    """Test that a seed gives the same counts whatever the batching."""
+    serial = count_simulations(40, 20, seed=3, workers=1, batch_size=40)
+    parallel = count_simulations(40, 20, seed=3, workers=2, batch_size=7)
+    assert (serial == parallel).all()
+    assert (serial <= 40).all()
+
+
+def test_simulation_reset():
+    """Test that a reset simulation repeats a fresh one with the same seed."""
+    fresh = Simulation(np.random.default_rng(5)).simulate(50)
+    simulation = Simulation(np.random.default_rng(6))
+    simulation.simulate(50)
+    simulation.reset(np.random.default_rng(5))
+    assert simulation.simulate(50) == fresh
+    simulation.reset()
+    assert simulation.template_restaurant.num_customers == 0
+    assert not simulation.template_restaurant.tables
+
+
+def test_restaurant_tables():
+    """Test that tables store each distinct string once."""
+    restaurant = RootRestaurant(1)
+    random_stream = RandomStream(np.random.default_rng(2))
+    for _ in range(200):
+        restaurant.seat_new_customer(random_stream)
+    assert sorted(restaurant.dishes) == ["C", "V"]
+    assert sum(table.num_customers for table in restaurant.tables) == 200
+    assert {table.string for table in restaurant.tables} == {"C", "V"}
+
+
+def test_template_description():
+    """Test that templates are described by their lengths and runs."""
+    restaurant = TemplateRestaurant()
+    assert restaurant.describe("rrss") == (2, 2, 2)
+    assert restaurant.describe("srrs") == (2, 2, 3)
+    assert restaurant.describe("rsrs") == (2, 2, 4)
+    assert restaurant.describe("rrr") == (3, 0, 1)
+    assert segment_class("CCC") == "C" and segment_class("CVC") is None
+
+
+def test_intervals():
+    """Test the confidence intervals against published values."""
+    # Newcombe (1998), 81 of 263 and 0 of 10
+    assert np.allclose(wilson_interval(81, 263), (0.2553, 0.3662),
+                       atol=1e-4)
+    assert np.allclose(wilson_interval(0, 10), (0, 0.2775), atol=1e-4)
+    assert np.allclose(clopper_pearson_interval(81, 263), (0.2527, 0.3676),
+                       atol=1e-4)
+    # all successes: the lower bound solves low ** 10 = 0.025
+    assert np.allclose(clopper_pearson_interval(10, 10), (0.025 ** 0.1, 1))
+
+
+def test_count_until_converged():
+    """Test stopping early, and agreeing with count_simulations."""
+    counts, num_runs = count_until_converged(20, 0.2, seed=4, batch_size=10,
+                                             max_runs=1000)
+    assert num_runs < 1000
+    assert (counts == count_simulations(num_runs, 20, seed=4)).all()
+    parallel, parallel_runs = count_until_converged(
+        20, 0.2, seed=4, workers=2, batch_size=10, max_runs=1000)
+    assert parallel_runs == num_runs and (parallel == counts).all()
+
+
+def test_words():
+    """Test that streamed words agree with the counts of simulate."""
+    words = list(Simulation(np.random.default_rng(7)).words(200))
+    assert len(words) == 200
+    assert (Simulation(np.random.default_rng(7)).simulate(200) ==
+            Counter(typology for _, _, _, typology in words))
+    for template, root, residue, _ in words:
+        assert len(root) == template.count("r")
+        assert len(residue) == template.count("s")
+
+    lexicon = io.StringIO()
+    write_lexicon(words, lexicon)
+    lexicon.seek(0)
+    assert list(read_lexicon(lexicon)) == words
+
+    with pytest.raises(ValueError):
+        list(read_lexicon(io.StringIO("template\troot\n")))
+    with pytest.raises(ValueError):
+        list(read_lexicon(io.StringIO("")))
@@ -0,0 +1,58 @@
+"""Test my_model/sweep.py."""
+
+import io
+import os
+import numpy as np
+from my_model.count_simulations import count_simulations
+from my_model.sweep import (PARAMETERS, cell_key, grid, latin_hypercube,
+                            run_sweep, write_results)
+
+
+def test_grid():
+    """Test that the grid has every combination, with defaults filled in."""
+    cells = grid([10, 20], alpha=[0.5, 0.9], beta=[1, 5])
+    assert len(cells) == 8
+    assert {(cell["alpha"], cell["beta"]) for cell in cells} == {
+        (0.5, 1.0), (0.5, 5.0), (0.9, 1.0), (0.9, 5.0)}
+    assert all(cell["p"] == 0.5 for cell in cells)
+    # 5 and 5.0 are the same cell
+    assert (cell_key(grid([10], beta=[5])[0], 100, 1) ==
+            cell_key(grid([10], beta=[5.0])[0], 100, 1))
+
+
+def test_latin_hypercube():
+    """Test that each parameter's strata are sampled exactly once."""
+    cells = latin_hypercube(10, [20], np.random.default_rng(0),
+                            alpha=(0, 1), beta=(1, 11))
+    assert len(cells) == 10
+    assert sorted(int(cell["alpha"] * 10) for cell in cells) == list(range(10))
+    assert sorted(int(cell["beta"] - 1) for cell in cells) == list(range(10))
+
+
+def test_run_sweep(tmp_path):
+    """Test that cells are cached and match count_simulations."""
+    cells = grid([10], alpha=[0.5, 0.9])
+    results = run_sweep(cells, 20, str(tmp_path), seed=1)
+    assert len(os.listdir(tmp_path)) == 2
+
+    extended = grid([10], alpha=[0.5, 0.9, 0.7])
+    extended_results = run_sweep(extended, 20, str(tmp_path), seed=1,
+                                 workers=2)
+    assert len(os.listdir(tmp_path)) == 3
+    assert all((a == b).all() for a, b in zip(results, extended_results))
+
+    key = cell_key(cells[0], 20, 1)
+    parameters = {name: cells[0][name] for name in PARAMETERS}
+    assert (results[0] == count_simulations(
+        20, 10, int(key, 16), parameters=parameters)).all()
+
+    table = io.StringIO()
+    write_results(cells, results, 20, table)
+    assert len(table.getvalue().splitlines()) == 1 + 2 * 4
+
+
+def test_unseeded_sweep(tmp_path):
+    """Test that cells without a seed are not cached."""
+    cache_dir = str(tmp_path / "cache")
+    run_sweep(grid([10], alpha=[0.5]), 20, cache_dir)
+    assert not os.path.exists(cache_dir) or not os.listdir(cache_dir)
@@ -1,9 +1,10 @@
 """Test tableau.py."""
 
 import pytest
-from ot.tableau import Tableau
+from ot.tableau import Tableau, winner_typology
 from ot.constraints import ConstraintSet
 from ot.gen import Gen
+from ot.segments import encode
 
 
 @pytest.fixture
@@ -89,6 +90,14 @@ def test_tableau_arabic_like(tableau_arabic_like):
     """Test with a tableau that should yield concatenativity."""
     assert tableau_arabic_like.winners == [('C1', 'V4', 'C2', 'V5', 'C3')]
     assert tableau_arabic_like.typology == 'nonconcat_cv'
+    # the violations are only rendered when needed
+    assert tableau_arabic_like._violation_table is None
+    assert (tableau_arabic_like.violation_table[
+                ('C1', 'V4', 'C2', 'V5', 'C3')] ==
+            ['', '', '', '*', '*', '***'])
+    assert (tableau_arabic_like.violation_table[
+                ('C1', 'C2', 'C3', 'V4', 'V5')] ==
+            ['*!*', '', '**', '***', '', ''])
     print('\n')
     print(tableau_arabic_like.typology)
     print(tableau_arabic_like)
@@ -235,3 +244,37 @@ def test_tableau_anchor_multiple(tableau_anchor_multiple):
     print('\n')
     print(tableau_anchor_multiple.typology)
     print(tableau_anchor_multiple)
+
+
+def test_tableau_encoded(gen, tableau_arabic_like):
+    """Test that an encoded tableau has the same winner and printout."""
+    inputs = (encode(('C1', 'C2', 'C3')), encode(('V4', 'V5')))
+    tableau = Tableau(
+        inputs=inputs,
+        ranked_constraints=ConstraintSet([
+            "c_adj_v",
+            "align_left_root",
+            "align_right_root",
+            "align_left_residue",
+            "align_right_residue",
+            "contiguity",
+        ], encoded=True),
+        candidates=Gen(encoded=True).candidates(inputs)
+    )
+    assert tableau.winners == [encode(('C1', 'V4', 'C2', 'V5', 'C3'))]
+    assert tableau.typology == 'nonconcat_cv'
+    assert repr(tableau) == repr(tableau_arabic_like)
+
+
+def test_winner_typology_other_splits():
+    """Test winner types for roots and residues of other lengths."""
+    # a one-segment residue
+    assert winner_typology((('C1', 'V2', 'C3', 'C4'), ('V5',)),
+                           ('C1', 'V2', 'C3', 'V5', 'C4')) == 'infix'
+    assert winner_typology((('C1', 'C2', 'C3', 'C4'), ('V5',)),
+                           ('V5', 'C1', 'C2', 'C3', 'C4')) == 'concat_prefix'
+    # a vowel root in a consonant residue
+    assert winner_typology((('V1', 'V2'), ('C3', 'C4', 'C5')),
+                           ('C3', 'V1', 'C4', 'V2', 'C5')) == 'nonconcat_cv'
+    assert winner_typology((('C1', 'V2'), ('C3', 'V4', 'C5')),
+                           ('C3', 'C1', 'V4', 'V2', 'C5')) == 'unattested'
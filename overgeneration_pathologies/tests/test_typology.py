@@ -0,0 +1,98 @@
+"""Test typology.py."""
+
+from collections import Counter
+from ot.gen import Gen
+from ot.typology import (TypologySummary, print_count_typology,
+                         print_full_typology, print_language_typology,
+                         print_split_typologies)
+from ot.run_typologies import zukoff_prefix_rankings
+from ot.benchmark import run_benchmark
+
+
+def test_summary_merge():
+    """Test that merged summaries count the same as a single summary."""
+    counts = [Counter(concat_suffix=10),
+              Counter(concat_suffix=4, nonconcat_cv=1, unattested=5),
+              Counter(infix=2, nonconcat_cv=2, unattested=6)]
+    whole = TypologySummary()
+    for list_of_typologies in counts:
+        whole.add(list_of_typologies)
+
+    first, second = TypologySummary(), TypologySummary()
+    first.add(counts[0])
+    second.add(counts[1])
+    second.add(counts[2])
+    first.merge(second)
+
+    assert str(first) == str(whole)
+    assert whole.total_count == 3
+    assert whole.count_at_least_1_nonconcat == 2
+    assert whole.count_at_least_half_nonconcat == 2
+    assert whole.count_at_least_1_unattested == 2
+    assert whole.count_at_least_half_unattested == 1
+
+
+def test_count_typology_engines_agree(capsys):
+    """Test that all engines print the same count typology."""
+    print_count_typology(zukoff_prefix_rankings(), engine="tableau")
+    tableau_output = capsys.readouterr().out
+    print_count_typology(zukoff_prefix_rankings(), engine="matrix")
+    assert capsys.readouterr().out == tableau_output
+    print_count_typology(zukoff_prefix_rankings(), engine="tree")
+    assert capsys.readouterr().out == tableau_output
+    assert "35/60 (58.3%) rankings" in tableau_output
+
+
+def test_parallel_count_typology(capsys):
+    """Test that sharding over processes keeps the serial output."""
+    print_count_typology(zukoff_prefix_rankings())
+    serial_output = capsys.readouterr().out
+    print_count_typology(zukoff_prefix_rankings(), workers=2, chunk_size=7)
+    assert capsys.readouterr().out == serial_output
+
+
+def test_parallel_full_typology(capsys):
+    """Test that sharding over processes keeps the serial output."""
+    print_full_typology(zukoff_prefix_rankings())
+    serial_output = capsys.readouterr().out
+    print_full_typology(zukoff_prefix_rankings(), workers=2, chunk_size=5)
+    assert capsys.readouterr().out == serial_output
+
+
+def test_other_gen(capsys):
+    """Test that a Gen with other root and residue lengths can be used."""
+    gen = Gen(segments='CCCCVV', root_length=2)
+    print_count_typology(zukoff_prefix_rankings(), engine="tableau", gen=gen)
+    tableau_output = capsys.readouterr().out
+    print_count_typology(zukoff_prefix_rankings(), gen=gen)
+    assert capsys.readouterr().out == tableau_output
+
+
+def test_split_typologies(capsys):
+    """Test that every split of the stem gets a count typology."""
+    print_split_typologies(zukoff_prefix_rankings(), 'CCCVV')
+    output = capsys.readouterr().out
+    assert output.count("Summary:") == 4
+    assert "CCCVV: root length 3, residue length 2" in output
+    assert "35/60 (58.3%) rankings" in output
+
+
+def test_language_typology(capsys):
+    """Test that every language is printed with its own winners."""
+    print_language_typology(['contiguity', 'c_adj_v', 'align_left_root',
+                             'align_left_residue'])
+    output = capsys.readouterr().out
+    rows = [line.split("\t") for line in
+            output.split("\n\nSummary:")[0].split("\n")[1:]]
+    assert sum(int(row[0]) for row in rows) == 24
+    assert len({row[-1] for row in rows}) == len(rows)
+    assert len(rows[0][-1].split()) == 10
+
+
+def test_benchmark():
+    """Test that the benchmark measures every split of each stem."""
+    rows = list(run_benchmark(5, 6))
+    assert [row[:2] for row in rows[:4]] == [('CCCVV', 1), ('CCCVV', 2),
+                                             ('CCCVV', 3), ('CCCVV', 4)]
+    assert len(rows) == 4 + 5
+    assert all(row[2] == 15 for row in rows[4:])
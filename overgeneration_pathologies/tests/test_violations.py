@@ -0,0 +1,66 @@
+"""Test violations.py."""
+
+import itertools
+import pytest
+from ot.violations import ViolationMatrix
+from ot.constraints import ConstraintSet, LIST_OF_CONSTRAINTS
+from ot.tableau import Tableau
+from ot.gen import Gen
+
+
+@pytest.fixture
+def gen():
+    """Set up Gen object as a fixture."""
+    yield Gen()
+
+
+@pytest.fixture
+def matrix(gen):
+    """Set up a ViolationMatrix over the default constraints as a fixture."""
+    yield ViolationMatrix(gen, ConstraintSet())
+
+
+def test_violation_counts(gen, matrix):
+    """Test that each row holds the violations of its candidate."""
+    constraint_set = ConstraintSet()
+    assert len(matrix) == 100
+    for row, candidate in enumerate(matrix.candidates):
+        inputs = matrix.inputs[matrix.input_index[row]]
+        assert list(matrix.violations[row]) == [
+            constraint(candidate, inputs) for constraint in constraint_set]
+
+
+def test_winners_match_tableau(gen, matrix):
+    """Test that the matrix picks the same winners as a Tableau."""
+    for ranking in itertools.islice(
+            itertools.permutations(LIST_OF_CONSTRAINTS), 0, 720, 37):
+        winners = matrix.winning_candidates(matrix.winners(ranking))
+        for inputs, input_winners in zip(matrix.inputs, winners):
+            tableau = Tableau(inputs, ConstraintSet(ranking),
+                              gen.candidates(inputs))
+            assert set(input_winners) == set(tableau.winners)
+
+
+def test_multiple_winners(matrix):
+    """Test a ranking that leaves two winners for one input."""
+    ranking = ["align_left_root", "align_right_residue",
+               "align_right_root", "c_adj_v", "contiguity"]
+    winners = matrix.winning_candidates(matrix.winners(ranking))
+    inputs = (('V1', 'C2', 'V3'), ('C4', 'C5'))
+    assert (set(winners[matrix.inputs.index(inputs)]) ==
+            set([('V1', 'C4', 'C2', 'V3', 'C5'),
+                 ('V1', 'C2', 'C4', 'V3', 'C5')]))
+
+
+def test_typology_counts(matrix):
+    """Test the count of winner types over all inputs."""
+    counts = matrix.typology_counts(matrix.winners([
+        "c_adj_v",
+        "align_left_root",
+        "align_right_residue",
+        "align_left_residue",
+        "align_right_root",
+        "contiguity",
+    ]))
+    assert counts == {'concat_suffix': 2, 'concat_prefix': 1, 'infix': 1,
+                      'nonconcat_cv': 1, 'unattested': 5}
@@ -0,0 +1,91 @@
+"""Test writer.py."""
+
+import itertools
+import os
+import pytest
+from ot.writer import TypologyWriter, checkpoint_path, read_typology
+from ot.typology import write_full_typology
+from ot.run_typologies import zukoff_prefix_rankings
+
+RESULTS = [((('C1', 'C2', 'C3'), ('V4', 'V5')),
+            [('C1', 'V4', 'C2', 'V5', 'C3')], 'nonconcat_cv')]
+
+
+def test_write_and_read(tmp_path):
+    """Test that rankings are read back in the order they were written."""
+    path = str(tmp_path / "typology.jsonl.gz")
+    with TypologyWriter(path, block_size=2) as writer:
+        for i in range(5):
+            writer.write(['c_adj_v', 'contiguity'][::(-1) ** i], RESULTS)
+
+    records = list(read_typology(path))
+    assert len(records) == 5
+    assert records[0]["ranking"] == ['c_adj_v', 'contiguity']
+    assert records[1]["ranking"] == ['contiguity', 'c_adj_v']
+    assert records[0]["results"][0] == {
+        "input": [['C1', 'C2', 'C3'], ['V4', 'V5']],
+        "winners": [['C1', 'V4', 'C2', 'V5', 'C3']],
+        "typology": 'nonconcat_cv'}
+
+
+def test_resume_after_crash(tmp_path):
+    """Test that a partly written block is dropped on resuming."""
+    path = str(tmp_path / "typology.jsonl.gz")
+    writer = TypologyWriter(path, block_size=3)
+    for i in range(7):
+        writer.write(['ranking', str(i)], RESULTS)
+    # crash: the seventh ranking was never flushed, and half a block
+    # was written without reaching the checkpoint
+    writer._file.write(b"\x1f\x8b half a block")
+    writer._file.close()
+
+    writer = TypologyWriter(path, block_size=3)
+    assert writer.completed == 6
+    for i in range(writer.completed, 8):
+        writer.write(['ranking', str(i)], RESULTS)
+    writer.close()
+
+    assert ([record["ranking"][1] for record in read_typology(path)] ==
+            [str(i) for i in range(8)])
+
+
+def test_resume_full_typology(tmp_path):
+    """Test that an interrupted run resumes where it left off."""
+    path = str(tmp_path / "resumed.jsonl.gz")
+    write_full_typology(itertools.islice(zukoff_prefix_rankings(), 25), path,
+                        block_size=10)
+    assert len(list(read_typology(path))) == 25
+    write_full_typology(zukoff_prefix_rankings(), path, block_size=10)
+
+    clean_path = str(tmp_path / "clean.jsonl.gz")
+    write_full_typology(zukoff_prefix_rankings(), clean_path, block_size=10)
+
+    assert list(read_typology(path)) == list(read_typology(clean_path))
+    assert len(list(read_typology(path))) == 60
+    with open(checkpoint_path(path)) as checkpoint_file:
+        assert '"rankings": 60' in checkpoint_file.read()
+
+
+def test_existing_file_kept(tmp_path):
+    """Test that a file without a checkpoint is not overwritten."""
+    path = tmp_path / "results.jsonl.gz"
+    path.write_bytes(b"earlier results")
+    with pytest.raises(FileExistsError):
+        TypologyWriter(str(path))
+    assert path.read_bytes() == b"earlier results"
+
+
+def test_truncated_file_refused(tmp_path):
+    """Test that a file shorter than its checkpoint is not resumed."""
+    path = str(tmp_path / "typology.jsonl.gz")
+    with TypologyWriter(path, block_size=2) as writer:
+        for i in range(4):
+            writer.write(['ranking', str(i)], RESULTS)
+    with open(path, "r+b") as typology_file:
+        typology_file.truncate(10)
+    with pytest.raises(ValueError):
+        TypologyWriter(path)
+
+    os.remove(path)
+    with pytest.raises(ValueError):
+        TypologyWriter(path)